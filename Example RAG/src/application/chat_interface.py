@@ -5,20 +5,33 @@ Provides a ChatGPT-like conversational experience with streaming responses.
 
 import streamlit as st
 import asyncio
+import io
 import logging
-from typing import Optional, AsyncIterator
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional, AsyncIterator, Iterator
 import time
+import uuid
+import datetime
 
-from core.rag_engine import RAGEngine
-from core.conversation_manager import ConversationManager
 from utils.config import AppConfig, get_config
 
+if TYPE_CHECKING:
+    # Imported for annotations only; the core modules pull in LangChain/Chroma
+    from core.rag_engine import RAGEngine
+    from core.conversation_manager import ConversationManager
+
 logger = logging.getLogger(__name__)
 
 
+class ChatMessage(NamedTuple):
+    """A chat message kept in session state for display and export."""
+    role: str
+    content: str
+    timestamp: float
+
+
 def render_chat_interface(
-    rag_engine: Optional[RAGEngine] = None,
-    conversation_manager: Optional[ConversationManager] = None,
+    rag_engine: Optional["RAGEngine"] = None,
+    conversation_manager: Optional["ConversationManager"] = None,
     config: Optional[AppConfig] = None
 ) -> None:
     """
@@ -51,17 +64,34 @@ def render_chat_interface(
     except Exception as e:
         logger.warning(f"Could not get engine stats: {e}")
     
+    # Chat history and input; only this fragment reruns when a message is sent
+    _render_chat_fragment(rag_engine)
+    
+    # Display conversation statistics in sidebar
+    if st.sidebar.checkbox("📊 Show conversation stats"):
+        _display_conversation_stats(conversation_manager, rag_engine)
+
+
+@st.fragment
+def _render_chat_fragment(rag_engine: "RAGEngine") -> None:
+    """
+    Render the chat history and input as a Streamlit fragment.
+    
+    Submitting a message reruns only this fragment, so the sidebar, knowledge
+    base lookups and engine stats outside it are not recomputed while the
+    answer streams. Once the answer is stored the whole app reruns, so the
+    sidebar statistics and chat export include the new exchange.
+    
+    Args:
+        rag_engine: RAG engine for generating responses
+    """
     # Display chat history
     _display_chat_history()
     
     # Chat input
     if prompt := st.chat_input("Ask a question about your documents..."):
         # Add user message to session state immediately
-        st.session_state.messages.append({
-            "role": "user", 
-            "content": prompt,
-            "timestamp": time.time()
-        })
+        st.session_state.messages.append(ChatMessage("user", prompt, time.time()))
         
         # Display user message
         with st.chat_message("user"):
@@ -69,79 +99,54 @@ def render_chat_interface(
         
         # Generate and display assistant response
         with st.chat_message("assistant"):
-            message_placeholder = st.empty()
-            full_response = ""
-            
+            # Show immediate feedback while documents are retrieved, since no
+            # tokens can stream until the retrieved context is in the prompt
+            status = st.empty()
+            status.caption("Searching your documents...")
             try:
-                # Create a simple synchronous generator for streaming
-                def get_sync_response():
-                    async def collect_response():
-                        chunks = []
-                        async for chunk in rag_engine.generate_response(prompt):
-                            chunks.append(chunk)
-                        return chunks
-                    
-                    return asyncio.run(collect_response())
-                
-                response_chunks = get_sync_response()
-                
-                # Display chunks with typing effect
-                for chunk in response_chunks:
-                    full_response += chunk
-                    # Update the placeholder with current response + cursor
-                    message_placeholder.markdown(full_response + "▌")
-                    time.sleep(0.02)  # Small delay for smooth typing effect
-                
-                # Final update without cursor
-                message_placeholder.markdown(full_response)
+                # Render tokens as they arrive from the LLM
+                full_response = st.write_stream(
+                    _clear_on_first_chunk(_iter_response_sync(rag_engine, prompt), status)
+                )
                 
                 # Add assistant response to session state
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": full_response,
-                    "timestamp": time.time()
-                })
+                st.session_state.messages.append(ChatMessage("assistant", full_response, time.time()))
                 
             except Exception as e:
                 error_message = f"I apologize, but I encountered an error: {str(e)}"
-                message_placeholder.markdown(error_message)
+                st.markdown(error_message)
                 
                 # Add error message to session state
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": error_message,
-                    "timestamp": time.time()
-                })
+                st.session_state.messages.append(ChatMessage("assistant", error_message, time.time()))
                 
                 logger.error(f"Error in chat interface: {str(e)}")
-    
-    # Display conversation statistics in sidebar
-    if st.sidebar.checkbox("📊 Show conversation stats"):
-        _display_conversation_stats(conversation_manager, rag_engine)
+        
+        # Kept outside the try block, since st.rerun works by raising
+        st.rerun(scope="app")
 
 
 def _initialize_chat_session_state() -> None:
     """Initialize session state variables for chat interface."""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    
-    if "chat_started" not in st.session_state:
-        st.session_state.chat_started = False
+    # Steady-state reruns only pay for this single membership check
+    if "_chat_initialized" in st.session_state:
+        return
     
-    if "current_session_id" not in st.session_state:
-        import uuid
-        st.session_state.current_session_id = str(uuid.uuid4())
+    # setdefault keeps any value another component stored before the first render
+    st.session_state.setdefault("messages", [])
+    st.session_state.setdefault("chat_started", False)
+    st.session_state.setdefault("current_session_id", str(uuid.uuid4()))
+    st.session_state._chat_initialized = True
 
 
 def _display_chat_history() -> None:
     """Display the chat message history."""
     # Display all messages from session state
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    for role, content, _ in st.session_state.messages:
+        with st.chat_message(role):
+            st.markdown(content)
 
 
-async def _get_streaming_response(rag_engine: RAGEngine, prompt: str) -> AsyncIterator[str]:
+async def _get_streaming_response(rag_engine: "RAGEngine", prompt: str) -> AsyncIterator[str]:
     """
     Get streaming response from RAG engine.
     
@@ -160,9 +165,73 @@ async def _get_streaming_response(rag_engine: RAGEngine, prompt: str) -> AsyncIt
         yield f"Error generating response: {str(e)}"
 
 
+def _iter_response_sync(rag_engine: "RAGEngine", prompt: str) -> Iterator[str]:
+    """
+    Adapt the RAG engine's async response stream to a synchronous generator.
+    
+    Each chunk is pulled from the async generator as soon as it is produced,
+    so `st.write_stream` can render tokens while the LLM is still generating.
+    
+    Args:
+        rag_engine: RAG engine to generate response
+        prompt: User's input prompt
+        
+    Yields:
+        String chunks of the response
+    """
+    loop = _get_event_loop()
+    agen = _get_streaming_response(rag_engine, prompt).__aiter__()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+
+
+def _clear_on_first_chunk(chunks: Iterator[str], placeholder: Any) -> Iterator[str]:
+    """
+    Pass chunks through, clearing a status placeholder once output begins.
+    
+    Args:
+        chunks: Response chunks to forward
+        placeholder: Streamlit placeholder showing progress until the first chunk
+        
+    Yields:
+        The chunks unchanged
+    """
+    try:
+        for chunk in chunks:
+            if placeholder is not None:
+                placeholder.empty()
+                placeholder = None
+            yield chunk
+    finally:
+        if placeholder is not None:
+            placeholder.empty()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the event loop used to drive chat responses for this session.
+    
+    The loop is created once and kept in session state rather than paying for
+    a fresh loop and default executor on every chat turn. It is per session
+    because a session's script runs serially, whereas a process-wide loop
+    could be entered concurrently by two sessions.
+    """
+    loop = st.session_state.get("_chat_event_loop")
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        st.session_state._chat_event_loop = loop
+    return loop
+
+
 def _display_conversation_stats(
-    conversation_manager: Optional[ConversationManager],
-    rag_engine: Optional[RAGEngine]
+    conversation_manager: Optional["ConversationManager"],
+    rag_engine: Optional["RAGEngine"]
 ) -> None:
     """
     Display conversation and engine statistics in the sidebar.
@@ -174,10 +243,18 @@ def _display_conversation_stats(
     st.sidebar.subheader("💬 Conversation Stats")
     
     try:
-        # Session message count
-        message_count = len(st.session_state.get('messages', []))
-        user_messages = len([m for m in st.session_state.get('messages', []) if m['role'] == 'user'])
-        ai_messages = len([m for m in st.session_state.get('messages', []) if m['role'] == 'assistant'])
+        # Session message counts and first timestamp, gathered in a single pass
+        messages = st.session_state.get('messages', [])
+        message_count = len(messages)
+        user_messages = 0
+        now = time.time()
+        first_message_time = now
+        for message in messages:
+            if message.role == 'user':
+                user_messages += 1
+            timestamp = message.timestamp
+            if timestamp < first_message_time:
+                first_message_time = timestamp
         
         col1, col2 = st.sidebar.columns(2)
         with col1:
@@ -212,9 +289,8 @@ def _display_conversation_stats(
         st.sidebar.write("**Session:**")
         st.sidebar.write(f"• ID: {st.session_state.get('current_session_id', 'Unknown')[:8]}...")
         
-        if st.session_state.get('messages'):
-            first_message_time = min(m.get('timestamp', time.time()) for m in st.session_state.messages)
-            duration = time.time() - first_message_time
+        if messages:
+            duration = now - first_message_time
             st.sidebar.write(f"• Duration: {duration/60:.1f} min")
         
     except Exception as e:
@@ -231,7 +307,6 @@ def clear_chat_history() -> None:
         st.session_state.chat_started = False
     
     # Generate new session ID
-    import uuid
     st.session_state.current_session_id = str(uuid.uuid4())
     
     logger.info("Cleared chat history")
@@ -249,28 +324,26 @@ def export_chat_history() -> Optional[str]:
         return None
     
     try:
-        import datetime
-        export_lines = [
-            "# Chat Export",
-            f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            f"Session ID: {st.session_state.get('current_session_id', 'Unknown')}",
-            f"Total Messages: {len(messages)}",
-            "",
-        ]
+        buffer = io.StringIO()
+        buffer.write(
+            "# Chat Export\n"
+            f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"Session ID: {st.session_state.get('current_session_id', 'Unknown')}\n"
+            f"Total Messages: {len(messages)}\n"
+            "\n"
+        )
         
-        for i, message in enumerate(messages, 1):
-            role = "🧑 User" if message['role'] == 'user' else "🤖 Assistant"
-            timestamp = message.get('timestamp', time.time())
-            timestamp_str = datetime.datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')
+        fromtimestamp = datetime.datetime.fromtimestamp
+        write = buffer.write
+        for i, (role, content, timestamp) in enumerate(messages, 1):
+            role_label = "🧑 User" if role == 'user' else "🤖 Assistant"
+            timestamp_str = fromtimestamp(timestamp).strftime('%H:%M:%S')
             
-            export_lines.extend([
-                f"## Message {i} - {role} ({timestamp_str})",
-                "",
-                message['content'],
-                "",
-            ])
+            write(f"## Message {i} - {role_label} ({timestamp_str})\n\n{content}\n\n")
         
-        return "\n".join(export_lines)
+        # Drop the final blank line so the export ends with a single newline
+        buffer.truncate(buffer.tell() - 1)
+        return buffer.getvalue()
         
     except Exception as e:
         logger.error(f"Error exporting chat history: {str(e)}")
@@ -278,12 +351,17 @@ def export_chat_history() -> Optional[str]:
 
 
 def load_chat_history(
-    conversation_manager: ConversationManager,
+    conversation_manager: "ConversationManager",
     messages: list
 ) -> bool:
     """
     Load chat history into the conversation manager and session state.
     
+    The message dictionaries are converted to `ChatMessage` records for the
+    session. Timestamps come from the nanosecond "ts" written by
+    `ConversationManager.get_session_messages`, or an epoch seconds
+    "timestamp"; messages without either are stamped with the load time.
+    
     Args:
         conversation_manager: Conversation manager to load into
         messages: List of message dictionaries
@@ -296,7 +374,11 @@ def load_chat_history(
         clear_chat_history()
         
         # Load into session state
-        st.session_state.messages = messages.copy()
+        now = time.time()
+        st.session_state.messages = [
+            ChatMessage(message["role"], message["content"], _message_time(message, now))
+            for message in messages
+        ]
         st.session_state.chat_started = len(messages) > 0
         
         # Load into conversation manager
@@ -310,6 +392,14 @@ def load_chat_history(
         return False
 
 
+def _message_time(message: Dict[str, Any], default: float) -> float:
+    """Return a saved message's time in epoch seconds, or default if it has none."""
+    ts = message.get("ts")
+    if isinstance(ts, int) and not isinstance(ts, bool):
+        return ts / 1_000_000_000
+    return message.get("timestamp", default)
+
+
 def render_chat_controls() -> None:
     """Render chat control buttons in the sidebar."""
     st.sidebar.subheader("💬 Chat Controls")
@@ -318,21 +408,34 @@ def render_chat_controls() -> None:
     if st.sidebar.button("🗑️ Clear Chat", help="Clear all chat messages"):
         clear_chat_history()
         st.sidebar.success("Chat history cleared!")
-        st.rerun()
     
-    # Export chat button
+    # Export chat button; the export is serialized once and reused until the
+    # conversation changes, instead of on every rerun that shows the download
+    export_key = (
+        st.session_state.get('current_session_id'),
+        len(st.session_state.get('messages', []))
+    )
+    cached_export = st.session_state.get('_exported_chat')
+    if cached_export is not None and cached_export[0] != export_key:
+        cached_export = None
+        st.session_state._exported_chat = None
+    
     if st.sidebar.button("📥 Export Chat", help="Export chat history as text"):
-        exported_chat = export_chat_history()
-        if exported_chat:
-            st.sidebar.download_button(
-                label="📄 Download Chat History",
-                data=exported_chat,
-                file_name=f"chat_export_{int(time.time())}.md",
-                mime="text/markdown",
-                help="Download your chat history as a Markdown file"
-            )
-        else:
+        if cached_export is None:
+            cached_export = (export_key, export_chat_history(), f"chat_export_{int(time.time())}.md")
+            st.session_state._exported_chat = cached_export
+        if not cached_export[1]:
             st.sidebar.info("No chat history to export")
     
+    if cached_export is not None and cached_export[1]:
+        _, exported_chat, file_name = cached_export
+        st.sidebar.download_button(
+            label="📄 Download Chat History",
+            data=exported_chat,
+            file_name=file_name,
+            mime="text/markdown",
+            help="Download your chat history as a Markdown file"
+        )
+    
     # Chat statistics toggle
     return st.sidebar.checkbox("📊 Show Statistics", help="Display detailed chat and engine statistics")
\ No newline at end of file
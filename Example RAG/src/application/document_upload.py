@@ -5,19 +5,21 @@ Handles PDF file upload, validation, and processing.
 
 import streamlit as st
 import logging
-from typing import Optional, List
+from typing import TYPE_CHECKING, Any, Dict, Optional, List
 import asyncio
+import datetime
 
-from core.document_processor import DocumentProcessor
-from core.vector_store import VectorStoreManager
 from utils.config import AppConfig, get_config
-from langchain.schema import Document
+
+if TYPE_CHECKING:
+    # Imported for annotations only; the core modules pull in LangChain/Chroma
+    from core.vector_store import VectorStoreManager
 
 logger = logging.getLogger(__name__)
 
 
 def render_document_upload(
-    vector_store_manager: VectorStoreManager,
+    vector_store_manager: "VectorStoreManager",
     config: Optional[AppConfig] = None
 ) -> None:
     """
@@ -37,7 +39,10 @@ def render_document_upload(
     st.subheader("Knowledge Base")
     
     # Get existing knowledge bases
-    existing_kbs = vector_store_manager.list_knowledge_bases()
+    existing_kbs = _list_knowledge_bases_cached(
+        vector_store_manager,
+        str(vector_store_manager.persist_directory)
+    )
     kb_names = [kb['name'] for kb in existing_kbs]
     
     # Option to create new or use existing
@@ -83,32 +88,31 @@ def render_document_upload(
     )
     
     # Display file information
+    # UploadedFile.size is a plain attribute; getvalue() would copy the whole buffer
+    file_sizes_mb = [file.size / (1024 * 1024) for file in uploaded_files or []]
+    oversized_files = []
+    
     if uploaded_files:
         st.write(f"Selected {len(uploaded_files)} file(s):")
-        total_size_mb = 0
         
-        for file in uploaded_files:
-            file_size_mb = len(file.getvalue()) / (1024 * 1024)
-            total_size_mb += file_size_mb
-            
+        for file, file_size_mb in zip(uploaded_files, file_sizes_mb):
             col1, col2 = st.columns([3, 1])
             with col1:
                 st.write(f"📄 {file.name}")
             with col2:
                 st.write(f"{file_size_mb:.1f} MB")
         
-        st.write(f"**Total size:** {total_size_mb:.1f} MB")
+        st.write(f"**Total size:** {sum(file_sizes_mb):.1f} MB")
         
         # Validation
         oversized_files = [
-            file for file in uploaded_files 
-            if len(file.getvalue()) / (1024 * 1024) > config.max_file_size_mb
+            (file, file_size_mb) for file, file_size_mb in zip(uploaded_files, file_sizes_mb)
+            if file_size_mb > config.max_file_size_mb
         ]
         
         if oversized_files:
             st.error(f"The following files exceed the {config.max_file_size_mb}MB limit:")
-            for file in oversized_files:
-                file_size_mb = len(file.getvalue()) / (1024 * 1024)
+            for file, file_size_mb in oversized_files:
                 st.error(f"• {file.name} ({file_size_mb:.1f} MB)")
     
     # Process button
@@ -116,7 +120,7 @@ def render_document_upload(
         knowledge_base_name and 
         knowledge_base_name.strip() and 
         uploaded_files and 
-        not any(len(f.getvalue()) / (1024 * 1024) > config.max_file_size_mb for f in uploaded_files)
+        not oversized_files
     )
     
     if st.button(
@@ -151,7 +155,6 @@ def render_document_upload(
                     st.write(f"**Collection:** {kb['collection_name']}")
                     st.write(f"**Documents:** {kb['document_count']}")
                     # Convert timestamp to readable date
-                    import datetime
                     created_date = datetime.datetime.fromtimestamp(kb['created_at'])
                     st.write(f"**Created:** {created_date.strftime('%Y-%m-%d %H:%M')}")
                 
@@ -169,7 +172,7 @@ def render_document_upload(
 async def _process_documents(
     uploaded_files: List,
     knowledge_base_name: str,
-    vector_store_manager: VectorStoreManager,
+    vector_store_manager: "VectorStoreManager",
     create_new: bool,
     config: AppConfig
 ) -> None:
@@ -183,6 +186,9 @@ async def _process_documents(
         create_new: Whether to create a new knowledge base
         config: Application configuration
     """
+    # Deferred so the PDF/LangChain stack is only loaded when documents are processed
+    from core.document_processor import DocumentProcessor
+    
     try:
         # Initialize document processor
         doc_processor = DocumentProcessor(config)
@@ -193,30 +199,35 @@ async def _process_documents(
         
         all_documents = []
         processed_files = 0
+        total_files = len(uploaded_files)
+        status_text.text(f"Processing {total_files} file(s)...")
         
-        for i, uploaded_file in enumerate(uploaded_files):
-            try:
-                # Update progress
-                progress = (i + 0.5) / len(uploaded_files)
-                progress_bar.progress(progress)
-                status_text.text(f"Processing {uploaded_file.name}...")
-                
-                # Process the file
-                documents = await doc_processor.process_uploaded_file(uploaded_file)
+        completed = 0
+        
+        def _on_file_processed(index: int, result) -> None:
+            nonlocal completed, processed_files
+            completed += 1
+            uploaded_file = uploaded_files[index]
+            progress_bar.progress(completed / total_files)
+            
+            if isinstance(result, Exception):
+                st.error(f"Error processing {uploaded_file.name}: {str(result)}")
+                logger.error(f"Error processing {uploaded_file.name}: {str(result)}")
+                return
+            
+            processed_files += 1
+            status_text.text(f"Processed {uploaded_file.name} ({len(result)} chunks)")
+            logger.info(f"Successfully processed {uploaded_file.name}: {len(result)} chunks")
+        
+        # Process files concurrently; results come back in upload order
+        results = await doc_processor.process_uploaded_files(
+            uploaded_files,
+            on_complete=_on_file_processed
+        )
+        
+        for documents in results:
+            if documents and not isinstance(documents, Exception):
                 all_documents.extend(documents)
-                processed_files += 1
-                
-                # Update progress after processing
-                progress = (i + 1) / len(uploaded_files)
-                progress_bar.progress(progress)
-                status_text.text(f"Processed {uploaded_file.name} ({len(documents)} chunks)")
-                
-                logger.info(f"Successfully processed {uploaded_file.name}: {len(documents)} chunks")
-                
-            except Exception as e:
-                st.error(f"Error processing {uploaded_file.name}: {str(e)}")
-                logger.error(f"Error processing {uploaded_file.name}: {str(e)}")
-                continue
         
         if not all_documents:
             st.error("No documents could be processed. Please check your files and try again.")
@@ -261,10 +272,8 @@ async def _process_documents(
                 st.write(f"**Configured chunk size:** {doc_stats['chunk_size_config']} characters")
                 st.write(f"**Chunk overlap:** {doc_stats['chunk_overlap_config']} characters")
             
-            # Update session state to trigger knowledge base list refresh
-            if 'kb_refresh_trigger' not in st.session_state:
-                st.session_state.kb_refresh_trigger = 0
-            st.session_state.kb_refresh_trigger += 1
+            # Trigger knowledge base list refresh
+            _invalidate_knowledge_base_cache()
             
         except ValueError as ve:
             st.error(f"Error with knowledge base: {str(ve)}")
@@ -281,7 +290,62 @@ async def _process_documents(
         logger.error(f"Unexpected error during document processing: {str(e)}")
 
 
-def _delete_knowledge_base(name: str, vector_store_manager: VectorStoreManager) -> None:
+@st.cache_data(ttl=30, show_spinner=False)
+def _list_knowledge_bases_cached(
+    _vector_store_manager: "VectorStoreManager",
+    persist_directory: str
+) -> List[Dict[str, Any]]:
+    """
+    List knowledge bases, cached across Streamlit reruns.
+    
+    Listing opens the Chroma database and counts every collection, which is
+    too slow to repeat on each keystroke. The cache is keyed on the persist
+    directory (the manager itself is not hashed), cleared by
+    `_invalidate_knowledge_base_cache` after every write, and expires after
+    30 seconds to pick up changes made outside this app.
+    
+    Args:
+        _vector_store_manager: Vector store manager
+        persist_directory: Chroma persist directory, used as the cache key
+        
+    Returns:
+        List of knowledge base information dictionaries
+    """
+    return _vector_store_manager.list_knowledge_bases()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _get_knowledge_base_stats_cached(
+    _vector_store_manager: "VectorStoreManager",
+    persist_directory: str,
+    name: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Get knowledge base statistics, cached across Streamlit reruns.
+    
+    Args:
+        _vector_store_manager: Vector store manager
+        persist_directory: Chroma persist directory, used as the cache key
+        name: Name of the knowledge base
+        
+    Returns:
+        Dictionary containing statistics, or None if the knowledge base doesn't exist
+    """
+    return _vector_store_manager.get_knowledge_base_stats(name)
+
+
+def _invalidate_knowledge_base_cache() -> None:
+    """Drop cached knowledge base listings and stats after a create, update or delete."""
+    _list_knowledge_bases_cached.clear()
+    _get_knowledge_base_stats_cached.clear()
+    
+    # Update session state to trigger refresh
+    if 'kb_refresh_trigger' not in st.session_state:
+        st.session_state.kb_refresh_trigger = 0
+    st.session_state.kb_refresh_trigger += 1
+
+
+def _delete_knowledge_base(name: str, vector_store_manager: "VectorStoreManager") -> None:
     """
     Delete a knowledge base after user confirmation.
     
@@ -295,27 +359,24 @@ def _delete_knowledge_base(name: str, vector_store_manager: VectorStoreManager)
             success = vector_store_manager.delete_knowledge_base(name)
             if success:
                 st.success(f"✅ Successfully deleted knowledge base '{name}'")
-                # Update session state to trigger refresh
-                if 'kb_refresh_trigger' not in st.session_state:
-                    st.session_state.kb_refresh_trigger = 0
-                st.session_state.kb_refresh_trigger += 1
+                # Trigger knowledge base list refresh
+                _invalidate_knowledge_base_cache()
                 
                 # Clear the confirmation flag
                 st.session_state[f'confirm_delete_{name}'] = False
             else:
                 st.error(f"Failed to delete knowledge base '{name}'")
         else:
-            # Set confirmation flag and rerun
+            # Set confirmation flag; the next click on Delete confirms
             st.session_state[f'confirm_delete_{name}'] = True
             st.warning(f"Click 'Delete' again to confirm deletion of '{name}'")
-            st.rerun()
             
     except Exception as e:
         st.error(f"Error deleting knowledge base '{name}': {str(e)}")
         logger.error(f"Error deleting knowledge base '{name}': {str(e)}")
 
 
-def get_available_knowledge_bases(vector_store_manager: VectorStoreManager) -> List[str]:
+def get_available_knowledge_bases(vector_store_manager: "VectorStoreManager") -> List[str]:
     """
     Get list of available knowledge base names.
     
@@ -326,8 +387,36 @@ def get_available_knowledge_bases(vector_store_manager: VectorStoreManager) -> L
         List of knowledge base names
     """
     try:
-        knowledge_bases = vector_store_manager.list_knowledge_bases()
+        knowledge_bases = _list_knowledge_bases_cached(
+            vector_store_manager,
+            str(vector_store_manager.persist_directory)
+        )
         return [kb['name'] for kb in knowledge_bases]
     except Exception as e:
         logger.error(f"Error getting available knowledge bases: {str(e)}")
-        return []
\ No newline at end of file
+        return []
+
+
+def get_knowledge_base_stats(
+    vector_store_manager: "VectorStoreManager",
+    name: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Get statistics for a knowledge base, reusing results across reruns.
+    
+    Args:
+        vector_store_manager: Vector store manager
+        name: Name of the knowledge base
+        
+    Returns:
+        Dictionary containing statistics, or None if unavailable
+    """
+    try:
+        return _get_knowledge_base_stats_cached(
+            vector_store_manager,
+            str(vector_store_manager.persist_directory),
+            name
+        )
+    except Exception as e:
+        logger.error(f"Error getting stats for knowledge base '{name}': {str(e)}")
+        return None
@@ -5,7 +5,7 @@ Provides the primary interface for knowledge base management and chat functional
 
 import streamlit as st
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import os
 import sys
 from pathlib import Path
@@ -15,12 +15,20 @@ src_path = Path(__file__).parent.parent
 sys.path.insert(0, str(src_path))
 
 from utils.config import get_config, ensure_directories_exist
-from core.vector_store import VectorStoreManager
-from core.conversation_manager import ConversationManager
-from core.rag_engine import RAGEngine
-from application.document_upload import render_document_upload, get_available_knowledge_bases
+from application.document_upload import (
+    render_document_upload,
+    get_available_knowledge_bases,
+    get_knowledge_base_stats
+)
 from application.chat_interface import render_chat_interface, render_chat_controls
 
+if TYPE_CHECKING:
+    # Core modules pull in LangChain, Chroma and PyPDF; they are imported
+    # lazily below so the API key setup page renders without loading them
+    from core.vector_store import VectorStoreManager
+    from core.conversation_manager import ConversationManager
+    from core.rag_engine import RAGEngine
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -45,15 +53,17 @@ def main() -> None:
             }
         )
         
-        # Load configuration
-        config = get_config()
+        # Initialize session state
+        _initialize_session_state()
+        
+        # Load configuration once per session; it does not change at runtime
+        if st.session_state.config is None:
+            st.session_state.config = get_config()
+        config = st.session_state.config
         
         # Ensure required directories exist
         ensure_directories_exist(config)
         
-        # Initialize session state
-        _initialize_session_state()
-        
         # Check for OpenAI API key
         if not config.openai_api_key:
             _render_api_key_setup()
@@ -85,7 +95,8 @@ def _initialize_session_state() -> None:
         "app_initialized": False,
         "vector_store_manager": None,
         "conversation_manager": None,
-        "rag_engine": None
+        "rag_engine": None,
+        "config": None
     }
     
     for key, default_value in defaults.items():
@@ -116,10 +127,12 @@ def _render_api_key_setup() -> None:
     """)
 
 
-def _get_vector_store_manager(config) -> VectorStoreManager:
+def _get_vector_store_manager(config) -> "VectorStoreManager":
     """Get or create vector store manager instance."""
     if "vector_store_manager" not in st.session_state or st.session_state.vector_store_manager is None:
         try:
+            from core.vector_store import VectorStoreManager
+            
             st.session_state.vector_store_manager = VectorStoreManager(config)
             logger.info("Initialized VectorStoreManager")
         except Exception as e:
@@ -130,10 +143,12 @@ def _get_vector_store_manager(config) -> VectorStoreManager:
     return st.session_state.vector_store_manager
 
 
-def _get_conversation_manager(config) -> ConversationManager:
+def _get_conversation_manager(config) -> "ConversationManager":
     """Get or create conversation manager instance."""
     if "conversation_manager" not in st.session_state or st.session_state.conversation_manager is None:
         try:
+            from core.conversation_manager import ConversationManager
+            
             st.session_state.conversation_manager = ConversationManager(config)
             logger.info("Initialized ConversationManager")
         except Exception as e:
@@ -145,48 +160,56 @@ def _get_conversation_manager(config) -> ConversationManager:
 
 
 def _get_rag_engine(
-    vector_store_manager: VectorStoreManager,
-    conversation_manager: ConversationManager,
+    vector_store_manager: "VectorStoreManager",
+    conversation_manager: "ConversationManager",
     config
-) -> Optional[RAGEngine]:
+) -> Optional["RAGEngine"]:
     """Get or create RAG engine instance based on selected knowledge base."""
     selected_kb = st.session_state.get("selected_kb")
     
     if not selected_kb:
         return None
     
-    # Check if we need to create a new RAG engine
-    if (st.session_state.get("rag_engine") is None or 
-        st.session_state.get("current_kb") != selected_kb):
+    # Reuse the engine while neither the selection nor the KB contents changed
+    engine_key = (selected_kb, st.session_state.get("kb_refresh_trigger", 0))
+    rag_engine = st.session_state.get("rag_engine")
+    if rag_engine is not None and st.session_state.get("rag_engine_key") == engine_key:
+        return rag_engine
+    
+    try:
+        from core.rag_engine import RAGEngine
         
-        try:
-            # Get the vector store for the selected knowledge base
-            vector_store = vector_store_manager.get_knowledge_base(selected_kb)
-            
-            if vector_store is None:
-                st.error(f"Could not load knowledge base: {selected_kb}")
-                return None
-            
-            # Create RAG engine
-            rag_engine = RAGEngine(vector_store, conversation_manager, config)
-            
-            # Store in session state
-            st.session_state.rag_engine = rag_engine
-            st.session_state.current_kb = selected_kb
-            
-            logger.info(f"Created RAG engine for knowledge base: {selected_kb}")
-            
-        except Exception as e:
-            st.error(f"Failed to create RAG engine: {str(e)}")
-            logger.error(f"Failed to create RAG engine: {str(e)}")
+        # Get the vector store for the selected knowledge base
+        vector_store = vector_store_manager.get_knowledge_base(selected_kb)
+        
+        if vector_store is None:
+            st.error(f"Could not load knowledge base: {selected_kb}")
             return None
+        
+        # Create RAG engine, releasing the one built for the previous key
+        previous_engine = st.session_state.get("rag_engine")
+        if previous_engine is not None:
+            previous_engine.close()
+        
+        rag_engine = RAGEngine(vector_store, conversation_manager, config)
+        
+        # Store in session state
+        st.session_state.rag_engine = rag_engine
+        st.session_state.rag_engine_key = engine_key
+        
+        logger.info(f"Created RAG engine for knowledge base: {selected_kb}")
+        
+    except Exception as e:
+        st.error(f"Failed to create RAG engine: {str(e)}")
+        logger.error(f"Failed to create RAG engine: {str(e)}")
+        return None
     
     return st.session_state.get("rag_engine")
 
 
 def _render_sidebar(
-    vector_store_manager: VectorStoreManager,
-    conversation_manager: ConversationManager
+    vector_store_manager: "VectorStoreManager",
+    conversation_manager: "ConversationManager"
 ) -> None:
     """Render the sidebar with navigation and controls."""
     with st.sidebar:
@@ -217,30 +240,26 @@ def _render_sidebar(
         available_kbs = get_available_knowledge_bases(vector_store_manager)
         
         if available_kbs:
+            # Position of each KB in the options list (after the blank entry)
+            kb_options = [""] + available_kbs
+            kb_index = {name: i for i, name in enumerate(kb_options)}
+            
             selected_kb = st.selectbox(
                 "Select knowledge base:",
-                [""] + available_kbs,
-                index=0 if st.session_state.selected_kb not in available_kbs else available_kbs.index(st.session_state.selected_kb) + 1,
+                kb_options,
+                index=kb_index.get(st.session_state.selected_kb, 0),
                 key="kb_selector",
                 help="Choose a knowledge base to chat with"
             )
             
             # Update selected knowledge base
             if selected_kb and selected_kb != st.session_state.selected_kb:
-                st.session_state.selected_kb = selected_kb
-                # Clear existing RAG engine to force recreation
-                st.session_state.rag_engine = None
-                st.session_state.current_kb = None
-                # Clear conversation when switching knowledge bases
-                conversation_manager.clear_conversation()
-                if "messages" in st.session_state:
-                    st.session_state.messages = []
-                st.rerun()
+                _switch_knowledge_base(selected_kb, conversation_manager)
             
             if selected_kb:
                 # Show knowledge base stats
                 try:
-                    kb_stats = vector_store_manager.get_knowledge_base_stats(selected_kb)
+                    kb_stats = get_knowledge_base_stats(vector_store_manager, selected_kb)
                     if kb_stats:
                         st.success(f"✅ {kb_stats['document_count']} documents loaded")
                 except Exception as e:
@@ -253,7 +272,7 @@ def _render_sidebar(
         
         # Chat controls (only show on chat page)
         if st.session_state.current_page == "chat":
-            show_stats = render_chat_controls()
+            render_chat_controls()
         
         st.markdown("---")
         
@@ -264,17 +283,40 @@ def _render_sidebar(
         
         # Show current configuration
         with st.expander("🔧 Configuration"):
-            config = get_config()
+            config = st.session_state.config
             st.write(f"**Model:** {config.openai_model}")
             st.write(f"**Chunk Size:** {config.chunk_size}")
             st.write(f"**Memory Limit:** {config.max_conversation_history}")
             st.write(f"**Max File Size:** {config.max_file_size_mb}MB")
 
 
+def _switch_knowledge_base(name: str, conversation_manager: "ConversationManager") -> None:
+    """
+    Select a different knowledge base and reset the state tied to the old one.
+    
+    Args:
+        name: Name of the newly selected knowledge base
+        conversation_manager: Conversation manager whose history is cleared
+    """
+    previous_engine = st.session_state.get("rag_engine")
+    if previous_engine is not None:
+        previous_engine.close()
+    
+    # Single batched write: select the KB, drop the RAG engine so it is
+    # recreated, and clear the chat shown for the previous KB
+    st.session_state.update({
+        "selected_kb": name,
+        "rag_engine": None,
+        "rag_engine_key": None,
+        "messages": []
+    })
+    conversation_manager.clear_conversation()
+
+
 def _render_main_content(
-    vector_store_manager: VectorStoreManager,
-    rag_engine: Optional[RAGEngine],
-    conversation_manager: ConversationManager,
+    vector_store_manager: "VectorStoreManager",
+    rag_engine: Optional["RAGEngine"],
+    conversation_manager: "ConversationManager",
     config
 ) -> None:
     """Render the main content area based on current page."""
@@ -292,6 +334,16 @@ def _render_main_content(
     
     # Footer
     st.markdown("---")
+    _render_system_status(vector_store_manager)
+
+
+def _render_system_status(vector_store_manager: "VectorStoreManager") -> None:
+    """
+    Render the System Status footer.
+    
+    Args:
+        vector_store_manager: Vector store manager used for KB statistics
+    """
     with st.expander("🛠️ System Status"):
         col1, col2, col3 = st.columns(3)
         
@@ -302,7 +354,7 @@ def _render_main_content(
         with col2:
             selected_kb = st.session_state.get("selected_kb", "None")
             if selected_kb and selected_kb != "None":
-                kb_stats = vector_store_manager.get_knowledge_base_stats(selected_kb)
+                kb_stats = get_knowledge_base_stats(vector_store_manager, selected_kb)
                 doc_count = kb_stats['document_count'] if kb_stats else 0
             else:
                 doc_count = 0
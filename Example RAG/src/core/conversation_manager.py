@@ -4,8 +4,11 @@ Handles conversation history with configurable memory limits.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Deque, List, Dict, Any, Optional
+from datetime import datetime, timedelta
 
 from langchain.memory import ConversationBufferWindowMemory
 from langchain.schema import BaseMessage, HumanMessage, AIMessage
@@ -14,6 +17,54 @@ from utils.config import AppConfig
 
 logger = logging.getLogger(__name__)
 
+# Message classes used when restoring saved session messages
+_ROLE_MESSAGE_TYPES = {
+    "user": HumanMessage,
+    "assistant": AIMessage,
+}
+
+# Speaker prefixes used when formatting history for the RAG prompt
+_CONTEXT_PREFIXES = {
+    HumanMessage: "Human: ",
+    AIMessage: "Assistant: ",
+}
+
+
+@dataclass
+class _SessionMessage:
+    """A session message as stored internally; slotted to keep long histories small."""
+    __slots__ = ("role", "content", "ts")
+    
+    role: str
+    content: str
+    ts: int
+
+
+def _format_ts(ns: int) -> str:
+    """Format a `time.time_ns()` timestamp as a local ISO 8601 string."""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return (datetime.fromtimestamp(seconds) + timedelta(microseconds=remainder // 1000)).isoformat()
+
+
+def _to_ns(value: Any) -> int:
+    """
+    Convert a saved message timestamp to nanoseconds since the epoch.
+    
+    Args:
+        value: Epoch seconds or an ISO 8601 string; anything else means "now"
+        
+    Returns:
+        Timestamp in nanoseconds
+    """
+    try:
+        if isinstance(value, str):
+            return int(datetime.fromisoformat(value).timestamp() * 1_000_000) * 1000
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return int(value * 1_000_000) * 1000
+    except (ValueError, OverflowError, OSError):
+        pass
+    return time.time_ns()
+
 
 class ConversationManager:
     """Manages conversation memory and history for the RAG chatbot."""
@@ -34,9 +85,19 @@ class ConversationManager:
             memory_key="chat_history"
         )
         
-        # Additional storage for session management
-        self.session_messages: List[Dict[str, Any]] = []
+        # Additional storage for session management; the deque drops the
+        # oldest message itself once max_conversation_history is reached
+        self.session_messages: Deque[_SessionMessage] = deque(
+            maxlen=config.max_conversation_history
+        )
         self.session_id: Optional[str] = None
+        self._last_user_content: Optional[str] = None
+        
+        # Summary cache; every mutating method bumps _version to invalidate it
+        self._version = 0
+        self._last_update: Optional[int] = None
+        self._cached_summary: Optional[Dict[str, Any]] = None
+        self._cached_summary_version = -1
         
         logger.info(f"Initialized ConversationManager with memory_size={self.memory_size}")
     
@@ -53,28 +114,17 @@ class ConversationManager:
             self.memory.chat_memory.add_user_message(human_message)
             self.memory.chat_memory.add_ai_message(ai_message)
             
-            # Add to session messages for Streamlit display
-            timestamp = datetime.now().isoformat()
+            # Add to session messages for Streamlit display; timestamps are
+            # kept as integers and only formatted when requested
+            ts = time.time_ns()
             
             self.session_messages.extend([
-                {
-                    "role": "user",
-                    "content": human_message,
-                    "timestamp": timestamp
-                },
-                {
-                    "role": "assistant", 
-                    "content": ai_message,
-                    "timestamp": timestamp
-                }
+                _SessionMessage("user", human_message, ts),
+                _SessionMessage("assistant", ai_message, ts)
             ])
-            
-            # Maintain the message limit for session messages
-            max_messages = self.config.max_conversation_history
-            if len(self.session_messages) > max_messages:
-                # Remove oldest messages to maintain limit
-                excess = len(self.session_messages) - max_messages
-                self.session_messages = self.session_messages[excess:]
+            self._last_user_content = human_message
+            self._trim_memory()
+            self._mark_changed()
             
             logger.debug(f"Added message exchange. Total session messages: {len(self.session_messages)}")
             
@@ -94,14 +144,22 @@ class ConversationManager:
             logger.error(f"Error retrieving conversation history: {str(e)}")
             return []
     
-    def get_session_messages(self) -> List[Dict[str, Any]]:
+    def get_session_messages(self, iso_timestamps: bool = False) -> List[Dict[str, Any]]:
         """
         Get the current session messages for Streamlit display.
         
+        Args:
+            iso_timestamps: Also add an ISO 8601 "timestamp" to each returned message
+            
         Returns:
-            List of message dictionaries with role, content, and timestamp
+            List of message dictionaries with role, content, and "ts" in
+            nanoseconds since the epoch
         """
-        return self.session_messages.copy()
+        messages = [asdict(message) for message in self.session_messages]
+        if iso_timestamps:
+            for message in messages:
+                message["timestamp"] = _format_ts(message["ts"])
+        return messages
     
     def get_context_for_rag(self) -> str:
         """
@@ -111,19 +169,20 @@ class ConversationManager:
             Formatted string containing recent conversation history
         """
         try:
-            messages = self.get_conversation_history()
+            messages = self.memory.chat_memory.messages
             if not messages:
                 return ""
             
-            # Format messages for context
-            context_parts = []
-            for message in messages[-self.memory_size*2:]:  # Get recent messages only
-                if isinstance(message, HumanMessage):
-                    context_parts.append(f"Human: {message.content}")
-                elif isinstance(message, AIMessage):
-                    context_parts.append(f"Assistant: {message.content}")
+            # Only slice when there is more history than the window holds
+            window = self.memory_size * 2
+            recent = messages[-window:] if len(messages) > window else messages
             
-            return "\n".join(context_parts)
+            prefixes = _CONTEXT_PREFIXES
+            return "\n".join(
+                prefixes[type(message)] + message.content
+                for message in recent
+                if type(message) in prefixes
+            )
             
         except Exception as e:
             logger.error(f"Error generating RAG context: {str(e)}")
@@ -134,6 +193,9 @@ class ConversationManager:
         try:
             self.memory.clear()
             self.session_messages.clear()
+            self._last_user_content = None
+            self._mark_changed()
+            self._last_update = None
             logger.info("Cleared conversation history")
         except Exception as e:
             logger.error(f"Error clearing conversation: {str(e)}")
@@ -146,27 +208,39 @@ class ConversationManager:
             session_id: Unique identifier for the conversation session
         """
         self.session_id = session_id
+        self._version += 1
         logger.debug(f"Set session ID: {session_id}")
     
     def get_conversation_summary(self) -> Dict[str, Any]:
         """
         Get a summary of the current conversation state.
         
+        The summary is rebuilt only after the conversation has changed;
+        repeated calls in between return a copy of the cached result.
+        
         Returns:
             Dictionary containing conversation statistics and metadata
         """
         try:
-            langchain_messages = self.get_conversation_history()
+            if self._cached_summary_version != self._version:
+                langchain_messages = self.get_conversation_history()
+                
+                self._cached_summary = {
+                    "session_id": self.session_id,
+                    "total_session_messages": len(self.session_messages),
+                    "total_langchain_messages": len(langchain_messages),
+                    "memory_limit": self.config.max_conversation_history,
+                    "langchain_memory_size": self.memory_size,
+                    "last_update": (
+                        _format_ts(self._last_update)
+                        if self.session_messages and self._last_update is not None
+                        else None
+                    ),
+                    "conversation_active": len(self.session_messages) > 0
+                }
+                self._cached_summary_version = self._version
             
-            return {
-                "session_id": self.session_id,
-                "total_session_messages": len(self.session_messages),
-                "total_langchain_messages": len(langchain_messages),
-                "memory_limit": self.config.max_conversation_history,
-                "langchain_memory_size": self.memory_size,
-                "last_update": datetime.now().isoformat() if self.session_messages else None,
-                "conversation_active": len(self.session_messages) > 0
-            }
+            return dict(self._cached_summary)
             
         except Exception as e:
             logger.error(f"Error generating conversation summary: {str(e)}")
@@ -177,35 +251,42 @@ class ConversationManager:
         Load messages from a previous session.
         
         Args:
-            messages: List of message dictionaries to load
+            messages: List of message dictionaries to load, as returned by
+                `get_session_messages`; entries may instead carry an epoch
+                seconds or ISO 8601 "timestamp"
         """
         try:
             self.clear_conversation()
             
-            # Rebuild conversation history
-            user_messages = []
-            ai_messages = []
+            # Rebuild both histories in one pass, keeping the original order
+            memory_messages: List[BaseMessage] = []
+            session_messages: List[_SessionMessage] = []
             
             for msg in messages:
-                if msg["role"] == "user":
-                    user_messages.append(msg["content"])
-                elif msg["role"] == "assistant":
-                    ai_messages.append(msg["content"])
-            
-            # Add message pairs to maintain conversation flow
-            min_length = min(len(user_messages), len(ai_messages))
-            for i in range(min_length):
-                self.add_message(user_messages[i], ai_messages[i])
+                try:
+                    role = msg["role"]
+                    content = msg["content"]
+                    message_cls = _ROLE_MESSAGE_TYPES[role]
+                except (KeyError, TypeError):
+                    logger.warning(f"Skipping malformed session message: {msg!r}")
+                    continue
+                
+                # Prefer the nanosecond "ts" written by get_session_messages;
+                # older saves only carry a "timestamp"
+                ts = msg.get("ts")
+                if not isinstance(ts, int) or isinstance(ts, bool):
+                    ts = _to_ns(msg.get("timestamp"))
+                
+                memory_messages.append(message_cls(content=content))
+                session_messages.append(_SessionMessage(role, content, ts))
+                if role == "user":
+                    self._last_user_content = content
             
-            # Handle any remaining messages
-            if len(user_messages) > min_length:
-                # There's a pending user message without AI response
-                self.memory.chat_memory.add_user_message(user_messages[-1])
-                self.session_messages.append({
-                    "role": "user",
-                    "content": user_messages[-1],
-                    "timestamp": datetime.now().isoformat()
-                })
+            if memory_messages:
+                self.memory.chat_memory.messages.extend(memory_messages)
+                self.session_messages.extend(session_messages)
+                self._trim_memory()
+                self._mark_changed()
             
             logger.info(f"Loaded {len(messages)} messages into conversation history")
             
@@ -222,15 +303,10 @@ class ConversationManager:
         try:
             self.memory.chat_memory.add_user_message(message)
             
-            self.session_messages.append({
-                "role": "user",
-                "content": message,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # Maintain message limit
-            if len(self.session_messages) > self.config.max_conversation_history:
-                self.session_messages = self.session_messages[1:]
+            self.session_messages.append(_SessionMessage("user", message, time.time_ns()))
+            self._last_user_content = message
+            self._trim_memory()
+            self._mark_changed()
             
             logger.debug(f"Added user message. Total session messages: {len(self.session_messages)}")
             
@@ -247,21 +323,33 @@ class ConversationManager:
         try:
             self.memory.chat_memory.add_ai_message(message)
             
-            self.session_messages.append({
-                "role": "assistant",
-                "content": message,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # Maintain message limit
-            if len(self.session_messages) > self.config.max_conversation_history:
-                self.session_messages = self.session_messages[1:]
+            self.session_messages.append(_SessionMessage("assistant", message, time.time_ns()))
+            self._trim_memory()
+            self._mark_changed()
             
             logger.debug(f"Added AI message. Total session messages: {len(self.session_messages)}")
             
         except Exception as e:
             logger.error(f"Error adding AI message: {str(e)}")
     
+    def _trim_memory(self) -> None:
+        """
+        Drop LangChain messages that have fallen out of the memory window.
+        
+        ConversationBufferWindowMemory only exposes the last k exchanges but
+        keeps every message in chat_memory, so long sessions would otherwise
+        accumulate message objects that are never read again.
+        """
+        messages = self.memory.chat_memory.messages
+        window = self.memory_size * 2
+        if window and len(messages) > window:
+            del messages[:-window]
+    
+    def _mark_changed(self) -> None:
+        """Record a mutation so the cached summary is rebuilt on next access."""
+        self._version += 1
+        self._last_update = time.time_ns()
+    
     def get_last_user_message(self) -> Optional[str]:
         """
         Get the last user message from the conversation.
@@ -269,7 +357,4 @@ class ConversationManager:
         Returns:
             The last user message content, or None if no user messages exist
         """
-        for message in reversed(self.session_messages):
-            if message["role"] == "user":
-                return message["content"]
-        return None
\ No newline at end of file
+        return self._last_user_content
\ No newline at end of file
@@ -4,9 +4,15 @@ Handles PDF loading, text extraction, and chunking for RAG pipeline.
 """
 
 import os
+import asyncio
+import hashlib
 import logging
+import pickle
+import shutil
 import tempfile
-from typing import List, Optional
+from datetime import datetime
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Optional, Sequence, Union
 from pathlib import Path
 
 from langchain_community.document_loaders import PyPDFLoader
@@ -17,6 +23,37 @@ from utils.config import AppConfig
 
 logger = logging.getLogger(__name__)
 
+# Chunk size used when streaming uploads to disk
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Chunked documents are cached under upload_dir, keyed on the PDF contents
+# and splitter settings. Bump the version when chunking output changes.
+CHUNK_CACHE_DIRNAME = ".chunk_cache"
+CHUNK_CACHE_VERSION = 1
+
+
+@lru_cache(maxsize=8)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Return a shared text splitter for the given settings; splitters hold no per-call state."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        add_start_index=True
+    )
+
+
+def _hash_file(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file, reading it in blocks."""
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        
+        digest = hashlib.sha256()
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b""):
+            digest.update(block)
+        return digest.hexdigest()
+
 
 class DocumentProcessor:
     """Handles PDF document processing and text chunking for RAG pipeline."""
@@ -28,12 +65,8 @@ class DocumentProcessor:
             config = get_config()
         
         self.config = config
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap,
-            length_function=len,
-            add_start_index=True
-        )
+        self.text_splitter = _get_splitter(config.chunk_size, config.chunk_overlap)
+        self.chunk_cache_dir = Path(config.upload_dir) / CHUNK_CACHE_DIRNAME
         
         logger.info(f"Initialized DocumentProcessor with chunk_size={config.chunk_size}, "
                    f"chunk_overlap={config.chunk_overlap}")
@@ -62,34 +95,139 @@ class DocumentProcessor:
         try:
             logger.info(f"Processing PDF: {file_path}")
             
-            # Load PDF using PyPDFLoader
+            # Re-uploads of the same PDF skip parsing and splitting entirely
+            cache_path = self._get_chunk_cache_path(file_path)
+            if cache_path is not None:
+                cached_documents = self._load_cached_chunks(cache_path, file_path)
+                if cached_documents is not None:
+                    return cached_documents
+            
+            # Load PDF using PyPDFLoader and split it page by page, so only
+            # one page is held in memory alongside the chunks produced so far
             loader = PyPDFLoader(file_path)
-            documents = await self._load_documents_async(loader)
+            chunked_documents: List[Document] = []
+            page_count = 0
             
-            if not documents:
-                raise ValueError(f"No content could be extracted from PDF: {file_path}")
+            async for page in self._iter_pages(loader):
+                page_count += 1
+                chunked_documents.extend(self.text_splitter.split_documents([page]))
             
-            # Split documents into chunks
-            chunked_documents = self.text_splitter.split_documents(documents)
+            if not page_count:
+                raise ValueError(f"No content could be extracted from PDF: {file_path}")
             
             logger.info(f"Successfully processed PDF: {file_path}, "
-                       f"extracted {len(documents)} pages, "
+                       f"extracted {page_count} pages, "
                        f"created {len(chunked_documents)} chunks")
             
+            if cache_path is not None:
+                self._store_cached_chunks(cache_path, chunked_documents)
+            
             return chunked_documents
             
         except Exception as e:
             logger.error(f"Error processing PDF {file_path}: {str(e)}")
             raise
     
-    async def _load_documents_async(self, loader: PyPDFLoader) -> List[Document]:
-        """Load documents asynchronously if supported, otherwise use sync method."""
+    async def _iter_pages(self, loader: PyPDFLoader) -> AsyncIterator[Document]:
+        """Yield pages one at a time, lazily loading them asynchronously if supported."""
+        alazy_load = getattr(loader, "alazy_load", None)
+        if alazy_load is not None:
+            async for page in alazy_load():
+                yield page
+            return
+        
+        # Fallback: pull pages from the synchronous lazy loader in a worker thread
+        pages = loader.lazy_load()
+        done = object()
+        while True:
+            page = await asyncio.to_thread(next, pages, done)
+            if page is done:
+                return
+            yield page
+    
+    def _get_chunk_cache_path(self, file_path: str) -> Optional[Path]:
+        """
+        Get the cache entry path for a PDF, or None if caching is disabled.
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Returns:
+            Path of the pickle holding the file's chunks under the current settings
+        """
+        if self.config.chunk_cache_max_mb <= 0:
+            return None
+        
         try:
-            # Try async loading first
-            return await loader.aload()
-        except AttributeError:
-            # Fallback to synchronous loading
-            return loader.load()
+            digest = _hash_file(file_path)
+        except OSError as e:
+            logger.warning(f"Could not hash {file_path} for chunk cache: {str(e)}")
+            return None
+        
+        key = f"{digest}-{self.config.chunk_size}-{self.config.chunk_overlap}-v{CHUNK_CACHE_VERSION}"
+        return self.chunk_cache_dir / f"{key}.pkl"
+    
+    def _load_cached_chunks(self, cache_path: Path, file_path: str) -> Optional[List[Document]]:
+        """Load cached chunks for a PDF, returning None on a miss or unreadable entry."""
+        try:
+            with open(cache_path, "rb") as f:
+                documents = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable chunk cache entry {cache_path}: {str(e)}")
+            return None
+        
+        # Mark the entry as recently used for eviction
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        
+        # Point the chunks at the file being processed now
+        for doc in documents:
+            doc.metadata["source"] = file_path
+        
+        logger.info(f"Loaded {len(documents)} cached chunks for PDF: {file_path}")
+        return documents
+    
+    def _store_cached_chunks(self, cache_path: Path, documents: List[Document]) -> None:
+        """Write chunks to the cache and evict the oldest entries above the size limit."""
+        try:
+            self.chunk_cache_dir.mkdir(parents=True, exist_ok=True)
+            
+            # Write to a temporary file first so readers never see a partial entry
+            with tempfile.NamedTemporaryFile(dir=self.chunk_cache_dir, suffix=".tmp", delete=False) as f:
+                pickle.dump(documents, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, cache_path)
+            
+            self._evict_chunk_cache()
+            
+        except Exception as e:
+            logger.warning(f"Failed to write chunk cache entry {cache_path}: {str(e)}")
+    
+    def _evict_chunk_cache(self) -> None:
+        """Delete least recently used cache entries until the cache fits its size limit."""
+        entries = []
+        total_size = 0
+        
+        with os.scandir(self.chunk_cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+        
+        limit = self.config.chunk_cache_max_mb * 1024 * 1024
+        for _, size, path in sorted(entries):
+            if total_size <= limit:
+                break
+            try:
+                os.unlink(path)
+                total_size -= size
+                logger.debug(f"Evicted chunk cache entry: {path}")
+            except FileNotFoundError:
+                total_size -= size
     
     async def process_uploaded_file(self, uploaded_file) -> List[Document]:
         """
@@ -105,8 +243,10 @@ class DocumentProcessor:
         if not uploaded_file.name.lower().endswith('.pdf'):
             raise ValueError("Only PDF files are supported")
         
-        # Validate file size
-        file_size_mb = len(uploaded_file.getvalue()) / (1024 * 1024)
+        # Validate file size by seeking to the end instead of copying the contents
+        uploaded_file.seek(0, os.SEEK_END)
+        file_size_mb = uploaded_file.tell() / (1024 * 1024)
+        uploaded_file.seek(0)
         if file_size_mb > self.config.max_file_size_mb:
             raise ValueError(f"File too large: {file_size_mb:.1f}MB. "
                            f"Maximum allowed: {self.config.max_file_size_mb}MB")
@@ -117,22 +257,31 @@ class DocumentProcessor:
         
         temp_file_path = None
         try:
-            # Save uploaded file to temporary location
-            temp_file_path = temp_dir / f"temp_{uploaded_file.name}"
-            with open(temp_file_path, "wb") as temp_file:
-                temp_file.write(uploaded_file.getvalue())
+            # Stream uploaded file to a uniquely named temporary location, so
+            # concurrent uploads sharing a filename cannot overwrite each other
+            with tempfile.NamedTemporaryFile(
+                dir=temp_dir,
+                prefix=f"temp_{Path(uploaded_file.name).stem}_",
+                suffix=".pdf",
+                delete=False
+            ) as temp_file:
+                temp_file_path = Path(temp_file.name)
+                shutil.copyfileobj(uploaded_file, temp_file, COPY_BUFFER_SIZE)
             
             # Process the temporary file
             documents = await self.process_pdf(str(temp_file_path))
             
-            # Add metadata about the original file
-            import datetime
+            # Add metadata about the original file; it is the same for every chunk.
+            # The source is reset to the uploaded name so context headers do not
+            # show the random temporary path, which would change on every upload
+            file_metadata = {
+                'source': uploaded_file.name,
+                'original_filename': uploaded_file.name,
+                'file_size_mb': file_size_mb,
+                'processed_at': datetime.now().isoformat()
+            }
             for doc in documents:
-                doc.metadata.update({
-                    'original_filename': uploaded_file.name,
-                    'file_size_mb': file_size_mb,
-                    'processed_at': datetime.datetime.now().isoformat()
-                })
+                doc.metadata.update(file_metadata)
             
             return documents
             
@@ -148,6 +297,43 @@ class DocumentProcessor:
                 except Exception as cleanup_error:
                     logger.warning(f"Failed to clean up temporary file {temp_file_path}: {cleanup_error}")
     
+    async def process_uploaded_files(
+        self,
+        uploaded_files: Sequence,
+        max_concurrency: Optional[int] = None,
+        on_complete: Optional[Callable[[int, Union[List[Document], Exception]], None]] = None
+    ) -> List[Union[List[Document], Exception]]:
+        """
+        Process several uploaded files concurrently.
+        
+        Args:
+            uploaded_files: Streamlit UploadedFile objects
+            max_concurrency: Maximum number of files processed at once
+                (defaults to the CPU count)
+            on_complete: Optional callback invoked with (index, result) as each
+                file finishes, e.g. to report progress
+            
+        Returns:
+            One entry per input file, in input order: the file's chunked
+            documents, or the exception raised while processing it
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or os.cpu_count() or 4)
+        
+        async def _process_one(index: int, uploaded_file) -> Union[List[Document], Exception]:
+            async with semaphore:
+                try:
+                    result = await self.process_uploaded_file(uploaded_file)
+                except Exception as e:
+                    result = e
+            
+            if on_complete is not None:
+                on_complete(index, result)
+            return result
+        
+        return await asyncio.gather(
+            *(_process_one(i, f) for i, f in enumerate(uploaded_files))
+        )
+    
     def get_document_stats(self, documents: List[Document]) -> dict:
         """
         Get statistics about processed documents.
@@ -0,0 +1,190 @@
+"""
+FAISS storage backend for knowledge bases.
+Keeps each knowledge base as a flat inner-product index plus a pickled
+docstore, and memory-maps the index when loading it for search.
+"""
+
+import logging
+import pickle
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.embeddings import Embeddings
+from langchain.schema import Document
+
+from utils.vecops import normalize_rows
+
+try:
+    import faiss
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+logger = logging.getLogger(__name__)
+
+# Same file names as LangChain's FAISS.save_local, so stores stay loadable there
+INDEX_FILENAME = "index.faiss"
+DOCSTORE_FILENAME = "index.pkl"
+
+
+def _read_index(path: Path, mmap: bool):
+    """
+    Read a FAISS index, memory-mapping it when requested.
+    
+    Args:
+        path: Index file path
+        mmap: Map the file instead of reading it into memory; mapped
+            indexes are read-only
+    
+    Returns:
+        FAISS index
+    """
+    if mmap:
+        try:
+            return faiss.read_index(str(path), faiss.IO_FLAG_MMAP)
+        except RuntimeError as e:
+            # Older faiss builds cannot map every index type
+            logger.debug(f"Could not memory-map FAISS index {path}: {str(e)}")
+    return faiss.read_index(str(path))
+
+
+class FaissCollection:
+    """Collection view exposing the `name` and `count()` that Chroma collections provide."""
+    
+    def __init__(self, name: str, index):
+        self.name = name
+        self._index = index
+    
+    def count(self) -> int:
+        return 0 if self._index is None else int(self._index.ntotal)
+
+
+class FaissVectorStore(FAISS):
+    """
+    LangChain FAISS store over an exact inner-product index.
+    
+    Document vectors are L2-normalized before indexing, so inner product is
+    cosine similarity for the unit-length OpenAI query embeddings. The store
+    exposes `_collection` like the Chroma store, so the RAG engine and the
+    manager read document counts the same way for both backends.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        embeddings: Embeddings,
+        index=None,
+        docstore: Optional[InMemoryDocstore] = None,
+        index_to_docstore_id: Optional[Dict[int, str]] = None
+    ):
+        """
+        Initialize the store.
+        
+        Args:
+            name: Sanitized knowledge base name
+            embeddings: Embeddings model used for queries
+            index: FAISS index, or None to create it from the first added batch
+            docstore: Documents keyed by docstore id
+            index_to_docstore_id: Index position -> docstore id
+        """
+        super().__init__(
+            embedding_function=embeddings,
+            index=index,
+            docstore=docstore if docstore is not None else InMemoryDocstore(),
+            index_to_docstore_id=index_to_docstore_id if index_to_docstore_id is not None else {},
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        self.name = name
+    
+    @property
+    def _collection(self) -> FaissCollection:
+        return FaissCollection(self.name, self.index)
+    
+    def add_document_vectors(self, batch: List[Document], vectors: List[List[float]]) -> None:
+        """
+        Add documents with precomputed vectors.
+        
+        Args:
+            batch: Documents to add
+            vectors: Embedding vectors, one per document
+        """
+        matrix = normalize_rows(vectors)
+        if self.index is None:
+            self.index = faiss.IndexFlatIP(matrix.shape[1])
+        
+        ids = [str(uuid.uuid4()) for _ in batch]
+        start = self.index.ntotal
+        self.index.add(matrix)
+        
+        self.docstore.add({
+            doc_id: Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+            for doc_id, doc in zip(ids, batch)
+        })
+        self.index_to_docstore_id.update({start + i: doc_id for i, doc_id in enumerate(ids)})
+    
+    def save(self, directory: Path) -> None:
+        """
+        Write the index and docstore to a directory.
+        
+        Args:
+            directory: Knowledge base directory
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self.index, str(directory / INDEX_FILENAME))
+        with open(directory / DOCSTORE_FILENAME, "wb") as f:
+            pickle.dump((self.docstore, self.index_to_docstore_id), f)
+    
+    @classmethod
+    def load(cls, name: str, directory: Path, embeddings: Embeddings, mmap: bool = True) -> "FaissVectorStore":
+        """
+        Load a store written by `save`.
+        
+        The docstore is a pickle, so only directories written by this
+        application should be loaded.
+        
+        Args:
+            name: Sanitized knowledge base name
+            directory: Knowledge base directory
+            embeddings: Embeddings model used for queries
+            mmap: Memory-map the index; pass False to load it for writing
+        
+        Returns:
+            FaissVectorStore instance
+        """
+        index = _read_index(directory / INDEX_FILENAME, mmap)
+        with open(directory / DOCSTORE_FILENAME, "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return cls(name, embeddings, index, docstore, index_to_docstore_id)
+
+
+def read_collection(name: str, directory: Path) -> FaissCollection:
+    """
+    Open a knowledge base's index for counting without loading its documents.
+    
+    Args:
+        name: Sanitized knowledge base name
+        directory: Knowledge base directory
+    
+    Returns:
+        Collection view over the memory-mapped index
+    """
+    return FaissCollection(name, _read_index(directory / INDEX_FILENAME, mmap=True))
+
+
+def list_index_names(root: Path) -> List[str]:
+    """
+    List the knowledge bases stored under a FAISS root directory.
+    
+    Args:
+        root: Directory holding one subdirectory per knowledge base
+    
+    Returns:
+        Names of subdirectories that contain an index file
+    """
+    if not root.exists():
+        return []
+    return sorted(path.name for path in root.iterdir() if (path / INDEX_FILENAME).exists())
@@ -4,20 +4,273 @@ Combines document retrieval with language model generation for contextual respon
 """
 
 import logging
-from typing import AsyncIterator, Optional, List, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import AsyncIterator, Optional, List, Dict, Any, Sequence, Set, Tuple
 import asyncio
+import hashlib
+import re
+import sys
+import time
+
+import numpy as np
 
 from langchain_chroma import Chroma
 from langchain_openai import ChatOpenAI
-from langchain.schema import Document
-from langchain.prompts import PromptTemplate
-from langchain.chains import ConversationalRetrievalChain
+from langchain.callbacks.base import AsyncCallbackHandler
+from langchain.globals import set_llm_cache
+from langchain.schema import Document, HumanMessage, SystemMessage
 
 from core.conversation_manager import ConversationManager
 from utils.config import AppConfig
+from utils.embedding_cache import CachedEmbeddings
+from utils.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Answer cache: near-identical questions over the same documents and history
+# reuse the previous answer instead of calling the LLM again
+ANSWER_CACHE_MAXSIZE = 256
+ANSWER_CACHE_TTL_SECONDS = 600
+CACHED_ANSWER_SLICE_SIZE = 64
+
+# Retrieval cache: repeated questions reuse the documents found last time
+# instead of searching the vector store again
+RETRIEVAL_CACHE_MAXSIZE = 1024
+RETRIEVAL_CACHE_TTL_SECONDS = 300
+
+# Paraphrased questions whose embeddings are at least this similar reuse the
+# documents retrieved for the earlier question
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_MAXSIZE = 4096
+
+LLM_CACHE_FILENAME = ".llm_cache.db"
+
+# Batched questions whose retrieved documents overlap at least this much
+# (relative to the smaller set) have their LLM calls issued back to back
+BATCH_CLUSTER_MIN_OVERLAP = 0.5
+
+# Follow-up prefetching (PREFETCH_FOLLOWUPS): number of predicted follow-up
+# questions whose documents are retrieved ahead of the next turn
+PREFETCH_FOLLOWUP_COUNT = 2
+FOLLOWUP_PROMPT = """A user asked the question below and received the answer below.
+Write the {count} follow-up questions the user is most likely to ask next, one per line, with no numbering.
+
+Question: {question}
+
+Answer: {answer}"""
+_LIST_MARKER_RE = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])?\s*")
+
+# Rank offset in reciprocal rank fusion; 60 is the value from the original paper
+RRF_RANK_OFFSET = 60
+
+# Seconds the vector store document count is reused in engine stats
+COUNT_CACHE_TTL_SECONDS = 5.0
+
+# Seconds a complete engine stats result is reused across Streamlit reruns
+STATS_CACHE_TTL_SECONDS = 2.0
+
+LLM_ERROR_PREFIX = "Error generating response: "
+
+# Answer given without calling the LLM when retrieval finds nothing; the
+# system prompt asks the model for the same text in that case
+NO_RELEVANT_INFO_MESSAGE = "No relevant information found."
+
+# Streamed tokens are merged into larger chunks before being yielded, so
+# the UI is updated at most every flush interval instead of per token
+STREAM_BUFFER_SIZE = 8192
+STREAM_FLUSH_INTERVAL = 0.025
+
+
+async def _coalesce_chunks(
+    chunks: AsyncIterator[str],
+    max_chars: int = STREAM_BUFFER_SIZE,
+    flush_interval: float = STREAM_FLUSH_INTERVAL
+) -> AsyncIterator[str]:
+    """
+    Merge small streamed chunks into larger ones.
+    
+    A merged chunk is yielded once it reaches max_chars or once flush_interval
+    seconds have passed since its first piece arrived, whichever comes first.
+    
+    Args:
+        chunks: Source stream of text chunks
+        max_chars: Buffer size that triggers an immediate flush
+        flush_interval: Maximum time a chunk is held back, in seconds
+        
+    Yields:
+        Merged text chunks, in order
+    """
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    buffer: List[str] = []
+    buffered_chars = 0
+    deadline = 0.0
+    pending = None
+    
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            
+            if not done:
+                # Flush interval elapsed while waiting for the next chunk
+                yield "".join(buffer)
+                buffer.clear()
+                buffered_chars = 0
+                continue
+            
+            finished, pending = pending, None
+            try:
+                chunk = finished.result()
+            except StopAsyncIteration:
+                break
+            
+            if not buffer:
+                deadline = loop.time() + flush_interval
+            buffer.append(chunk)
+            buffered_chars += len(chunk)
+            
+            if buffered_chars >= max_chars:
+                yield "".join(buffer)
+                buffer.clear()
+                buffered_chars = 0
+        
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+@lru_cache(maxsize=None)
+def _configure_llm_cache(backend: str, persist_dir: str) -> None:
+    """
+    Install LangChain's process-wide LLM cache once per backend and location.
+    
+    Args:
+        backend: "memory" or "sqlite"
+        persist_dir: Directory holding the SQLite cache file
+    """
+    if backend == "memory":
+        from langchain_community.cache import InMemoryCache
+        set_llm_cache(InMemoryCache())
+    elif backend == "sqlite":
+        from langchain_community.cache import SQLiteCache
+        set_llm_cache(SQLiteCache(database_path=str(Path(persist_dir) / LLM_CACHE_FILENAME)))
+    else:
+        raise ValueError(f"Unknown LLM cache backend: {backend}")
+    
+    logger.info(f"Enabled {backend} LLM cache")
+
+
+class _TokenQueueHandler(AsyncCallbackHandler):
+    """Callback handler that forwards streamed LLM tokens to an asyncio queue."""
+    
+    def __init__(self, queue: "asyncio.Queue[str]"):
+        self.queue = queue
+    
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.queue.put_nowait(token)
+
+
+def _cluster_by_overlap(
+    doc_sets: List[Set[str]],
+    min_overlap: float = BATCH_CLUSTER_MIN_OVERLAP
+) -> List[List[int]]:
+    """
+    Group items whose document sets overlap, using union-find.
+    
+    Two items are linked when their shared documents make up at least
+    min_overlap of the smaller set; clusters are the connected components.
+    
+    Args:
+        doc_sets: Document identifiers retrieved for each item
+        min_overlap: Minimum overlap fraction for linking two items
+        
+    Returns:
+        Clusters of item indices, ordered by their first item
+    """
+    parent = list(range(len(doc_sets)))
+    
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+    
+    for i in range(len(doc_sets)):
+        for j in range(i + 1, len(doc_sets)):
+            smaller = min(len(doc_sets[i]), len(doc_sets[j]))
+            if smaller and len(doc_sets[i] & doc_sets[j]) / smaller >= min_overlap:
+                parent[find(j)] = find(i)
+    
+    clusters: Dict[int, List[int]] = {}
+    for index in range(len(doc_sets)):
+        clusters.setdefault(find(index), []).append(index)
+    return list(clusters.values())
+
+
+def _reciprocal_rank_fusion(
+    ranked_lists: List[List[Document]],
+    limit: int,
+    rank_offset: int = RRF_RANK_OFFSET
+) -> List[Document]:
+    """
+    Merge ranked document lists with reciprocal rank fusion.
+    
+    Each document scores sum(1 / (rank_offset + rank)) over the lists it
+    appears in; documents with identical content are merged.
+    
+    Args:
+        ranked_lists: Document lists, each ordered best first
+        limit: Maximum number of documents to return
+        rank_offset: Constant damping the weight of top ranks
+        
+    Returns:
+        Fused documents, best first
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    
+    for ranked in ranked_lists:
+        for rank, document in enumerate(ranked, start=1):
+            key = document.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rank_offset + rank)
+            documents.setdefault(key, document)
+    
+    # sorted() is stable, so ties keep first-seen order
+    best = sorted(scores, key=scores.__getitem__, reverse=True)[:limit]
+    return [documents[key] for key in best]
+
+
+def _content_fingerprint(text: str) -> int:
+    """Hash a chunk's content, ignoring case and surrounding whitespace, to a 64-bit integer."""
+    digest = hashlib.blake2b(text.strip().lower().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+@dataclass
+class EngineStats:
+    """Engine statistics; each engine keeps one slotted instance and updates it in place."""
+    __slots__ = (
+        "model", "vector_store_documents", "retriever_k",
+        "conversation_active", "total_messages", "memory_limit"
+    )
+    
+    model: str
+    vector_store_documents: int
+    retriever_k: int
+    conversation_active: bool
+    total_messages: int
+    memory_limit: int
+
 
 class RAGEngine:
     """RAG engine that combines document retrieval with conversational AI."""
@@ -26,7 +279,8 @@ class RAGEngine:
         self, 
         vector_store: Chroma, 
         conversation_manager: ConversationManager,
-        config: Optional[AppConfig] = None
+        config: Optional[AppConfig] = None,
+        additional_retrievers: Optional[List[Any]] = None
     ):
         """
         Initialize RAG engine with vector store and conversation manager.
@@ -35,6 +289,9 @@ class RAGEngine:
             vector_store: Chroma vector store for document retrieval
             conversation_manager: Manager for conversation history
             config: Application configuration
+            additional_retrievers: Optional extra retrievers (e.g. keyword or
+                web search) queried in parallel with the vector store and
+                merged by reciprocal rank fusion
         """
         if config is None:
             from utils.config import get_config
@@ -43,6 +300,31 @@ class RAGEngine:
         self.config = config
         self.vector_store = vector_store
         self.conversation_manager = conversation_manager
+        self.additional_retrievers = list(additional_retrievers or [])
+        self.embeddings = self._get_query_embeddings(vector_store)
+        if config.llm_cache_backend != "none":
+            _configure_llm_cache(config.llm_cache_backend, config.chroma_persist_dir)
+        self._answer_cache: "OrderedDict[tuple, Tuple[float, str]]" = OrderedDict()
+        self._retrieval_cache: "OrderedDict[str, Tuple[float, List[Document]]]" = OrderedDict()
+        self._semantic_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD, maxsize=SEMANTIC_CACHE_MAXSIZE)
+        self._count_cache: Optional[Tuple[float, int]] = None
+        self._stats_time: Optional[float] = None
+        self._stats = EngineStats(
+            model=config.openai_model,
+            vector_store_documents=0,
+            retriever_k=config.retriever_k,
+            conversation_active=False,
+            total_messages=0,
+            memory_limit=config.max_conversation_history
+        )
+        
+        # (source, page) -> interned source label used in context headers
+        self._header_cache: Dict[Tuple[Any, Any], str] = {}
+        self._prefetch_future: Optional[Future] = None
+        
+        # Dedicated pool for blocking vector store calls, so retrieval does not
+        # queue behind unrelated work in the event loop's default executor
+        self._retrieve_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="rag-retrieve")
         
         # Initialize OpenAI Chat model with streaming
         self.llm = ChatOpenAI(
@@ -50,26 +332,55 @@ class RAGEngine:
             openai_api_key=config.openai_api_key,
             streaming=True,
             temperature=0.7,
-            max_tokens=1000
+            max_tokens=1000,
+            verbose=config.debug_chains
         )
         
         # Configure retriever
         self.retriever = vector_store.as_retriever(
             search_type="similarity",
-            search_kwargs={"k": 4}  # Retrieve top 4 most relevant chunks
+            search_kwargs={"k": config.retriever_k}  # Retrieve the most relevant chunks
         )
         
-        # Create conversational retrieval chain
-        self._setup_retrieval_chain()
+        # Build the prompt used for every response
+        self._setup_prompt()
         
         logger.info("Initialized RAG engine with conversational retrieval")
     
-    def _setup_retrieval_chain(self) -> None:
-        """Set up the conversational retrieval chain."""
-        # Custom prompt template for RAG responses
-        prompt_template = """You are a helpful AI assistant that answers questions based on the provided context and conversation history.
+    @staticmethod
+    def _get_query_embeddings(vector_store: Chroma) -> Optional[CachedEmbeddings]:
+        """
+        Get a caching wrapper around the vector store's embedding function.
+        
+        Args:
+            vector_store: Vector store whose embeddings embed the questions
+            
+        Returns:
+            Cached embeddings, or None if the vector store has no embedding function
+        """
+        embeddings = getattr(vector_store, "embeddings", None)
+        if embeddings is None or isinstance(embeddings, CachedEmbeddings):
+            return embeddings
+        return CachedEmbeddings(embeddings)
+    
+    def _setup_prompt(self) -> None:
+        """Set up the system message and question prompt for RAG responses."""
+        # The instructions never change, so they go in a byte-identical system
+        # message that OpenAI's prompt cache can reuse across requests
+        system_prompt = """You are a helpful AI assistant that answers questions based on the provided context and conversation history.
 
-Context from documents:
+Instructions:
+1. Use the provided context to answer the question accurately
+2. If the context doesn't contain relevant information, output the following verbatim: "No relevant information found." 
+3. Maintain conversation context from the history
+4. Be concise but comprehensive in your response
+5. If asked about previous parts of the conversation, refer to the chat history"""
+
+        self.system_message = SystemMessage(content=system_prompt)
+        
+        # Per-question part of the prompt; a plain str.format template avoids
+        # PromptTemplate's validation and PromptValue allocations per request
+        self.prompt = """Context from documents:
 {context}
 
 Conversation history:
@@ -77,30 +388,7 @@ Conversation history:
 
 Current question: {question}
 
-Instructions:
-1. Use the provided context to answer the question accurately
-2. If the context doesn't contain relevant information, output the following verbatim: "No relevant information found." 
-3. Maintain conversation context from the history
-4. Be concise but comprehensive in your response
-5. If asked about previous parts of the conversation, refer to the chat history
-
 Answer:"""
-
-        self.prompt = PromptTemplate(
-            template=prompt_template,
-            input_variables=["context", "chat_history", "question"]
-        )
-        
-        # Create the conversational retrieval chain
-        self.chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.retriever,
-            memory=self.conversation_manager.memory,
-            return_source_documents=True,
-            verbose=True
-        )
-        
-        logger.info("Set up conversational retrieval chain")
     
     async def generate_response(self, question: str) -> AsyncIterator[str]:
         """
@@ -112,36 +400,275 @@ Answer:"""
         Yields:
             String chunks of the response as they're generated
         """
+        async for event in self.astream_response(question):
+            if event["type"] == "token":
+                yield event["content"]
+    
+    async def astream_response(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a response to a question as a stream of events.
+        
+        Events are dictionaries with a "type" key:
+        - "retrieval": retrieval finished; "documents" holds the sources, so
+          callers can render them before the answer starts streaming
+        - "token": "content" holds the next chunk of the answer
+        - "done": generation finished; "answer" holds the full answer and
+          "cached" tells whether it came from the answer cache
+        
+        Args:
+            question: User's question
+            
+        Yields:
+            Event dictionaries in the order described above
+        """
         try:
             logger.info(f"Generating RAG response for question: {question[:100]}...")
             
-            # Get relevant documents
+            # Formatting the few remembered messages is quick in-memory work,
+            # so it runs inline rather than alongside retrieval
+            chat_history = self.conversation_manager.get_context_for_rag()
+            
             relevant_docs = await self._retrieve_documents(question)
+            yield {"type": "retrieval", "documents": relevant_docs}
+            
+            if not relevant_docs:
+                self.conversation_manager.add_message(question, NO_RELEVANT_INFO_MESSAGE)
+                yield {"type": "token", "content": NO_RELEVANT_INFO_MESSAGE}
+                yield {"type": "done", "answer": NO_RELEVANT_INFO_MESSAGE, "cached": False}
+                logger.info("No documents retrieved; skipped LLM call")
+                return
             
             # Prepare context from retrieved documents
             context = self._prepare_context(relevant_docs)
             
-            # Get conversation history
-            chat_history = self.conversation_manager.get_context_for_rag()
+            # Serve near-duplicate questions from the answer cache, still
+            # yielding in slices so callers see the usual streaming API
+            cache_key = None
+            if self.embeddings is not None:
+                question_vector = await self.embeddings.aembed_query(question)
+                cache_key = self._answer_cache_key(question_vector, relevant_docs, chat_history)
+                cached_answer = self._get_cached_answer(cache_key)
+                if cached_answer is not None:
+                    for start in range(0, len(cached_answer), CACHED_ANSWER_SLICE_SIZE):
+                        yield {"type": "token", "content": cached_answer[start:start + CACHED_ANSWER_SLICE_SIZE]}
+                    
+                    self.conversation_manager.add_message(question, cached_answer)
+                    yield {"type": "done", "answer": cached_answer, "cached": True}
+                    logger.info("Served response from answer cache")
+                    return
             
             # Generate response using streaming
-            response = ""
-            async for chunk in self._stream_llm_response(question, context, chat_history):
-                response += chunk
-                yield chunk
+            parts: List[str] = []
+            async for chunk in _coalesce_chunks(self._stream_llm_response(question, context, chat_history)):
+                parts.append(chunk)
+                yield {"type": "token", "content": chunk}
+            response = "".join(parts)
             
             # Add the complete exchange to conversation memory
             self.conversation_manager.add_message(question, response)
             
+            if cache_key is not None and response and not response.startswith(LLM_ERROR_PREFIX):
+                self._cache_answer(cache_key, response)
+                if self.config.prefetch_followups:
+                    self._schedule_prefetch(question, response)
+            
+            yield {"type": "done", "answer": response, "cached": False}
             logger.info(f"Generated response with {len(relevant_docs)} source documents")
             
         except Exception as e:
             logger.error(f"Error generating RAG response: {str(e)}")
             error_message = f"I apologize, but I encountered an error while generating a response: {str(e)}"
-            yield error_message
+            yield {"type": "token", "content": error_message}
             
             # Still add to conversation history for continuity
             self.conversation_manager.add_message(question, error_message)
+            yield {"type": "done", "answer": error_message, "cached": False}
+    
+    def _schedule_prefetch(self, question: str, answer: str) -> None:
+        """
+        Start prefetching documents for likely follow-up questions.
+        
+        The work runs in the retrieval thread pool rather than on the event
+        loop, which is only driven while a response is being streamed.
+        
+        Args:
+            question: Question that was just answered
+            answer: Answer given to it
+        """
+        if self._prefetch_future is not None:
+            self._prefetch_future.cancel()
+        self._prefetch_future = self._retrieve_pool.submit(self._prefetch_followups, question, answer)
+    
+    def _prefetch_followups(self, question: str, answer: str) -> None:
+        """
+        Predict follow-up questions and warm the caches with their documents.
+        
+        The predicted questions are embedded through the query embedding cache
+        and their search results are stored in the semantic cache, so a
+        matching next question skips both the embedding call and the search.
+        
+        Args:
+            question: Question that was just answered
+            answer: Answer given to it
+        """
+        if self.embeddings is None:
+            return
+        
+        try:
+            reply = self.llm.invoke([HumanMessage(content=FOLLOWUP_PROMPT.format(
+                count=PREFETCH_FOLLOWUP_COUNT,
+                question=question,
+                answer=answer
+            ))])
+            followups = [_LIST_MARKER_RE.sub("", line).strip() for line in str(reply.content).splitlines()]
+            followups = [line for line in followups if line][:PREFETCH_FOLLOWUP_COUNT]
+            
+            for followup in followups:
+                query_vector = self.embeddings.embed_query(followup)
+                if self._semantic_cache.get(query_vector) is None:
+                    documents = self.vector_store.similarity_search_by_vector(query_vector, k=self.config.retriever_k)
+                    self._semantic_cache.put(query_vector, list(documents))
+            
+            logger.debug(f"Prefetched documents for {len(followups)} follow-up questions")
+            
+        except Exception as e:
+            logger.warning(f"Error prefetching follow-up documents: {str(e)}")
+    
+    async def abatch_generate(self, questions: List[str]) -> List[str]:
+        """
+        Answer several questions at once.
+        
+        Retrieval for all questions runs concurrently. Questions are then
+        grouped by overlap of their retrieved documents, and the LLM calls of
+        each group are issued back to back so their shared context prefix can
+        be served from the provider's prompt cache. Every question sees the
+        conversation history as it was before the batch; the exchanges are
+        recorded afterwards in the original order.
+        
+        Args:
+            questions: Questions to answer
+            
+        Returns:
+            Answers in the same order as the questions
+        """
+        if not questions:
+            return []
+        
+        chat_history = self.conversation_manager.get_context_for_rag()
+        documents = await asyncio.gather(*(self._retrieve_documents(question) for question in questions))
+        
+        answers = [""] * len(questions)
+        clusters = _cluster_by_overlap([{doc.page_content for doc in docs} for docs in documents])
+        for cluster in clusters:
+            for index in cluster:
+                answers[index] = await self._generate_answer(questions[index], documents[index], chat_history)
+        
+        for question, answer in zip(questions, answers):
+            self.conversation_manager.add_message(question, answer)
+        
+        logger.info(f"Answered {len(questions)} batched questions in {len(clusters)} clusters")
+        return answers
+    
+    async def _generate_answer(self, question: str, documents: List[Document], chat_history: str) -> str:
+        """
+        Produce a complete answer from already retrieved documents.
+        
+        Args:
+            question: User's question
+            documents: Documents retrieved for the question
+            chat_history: Conversation history included in the prompt
+            
+        Returns:
+            The answer text
+        """
+        if not documents:
+            return NO_RELEVANT_INFO_MESSAGE
+        
+        cache_key = None
+        if self.embeddings is not None:
+            question_vector = await self.embeddings.aembed_query(question)
+            cache_key = self._answer_cache_key(question_vector, documents, chat_history)
+            cached_answer = self._get_cached_answer(cache_key)
+            if cached_answer is not None:
+                return cached_answer
+        
+        context = self._prepare_context(documents)
+        answer = "".join([chunk async for chunk in self._stream_llm_response(question, context, chat_history)])
+        
+        if cache_key is not None and answer and not answer.startswith(LLM_ERROR_PREFIX):
+            self._cache_answer(cache_key, answer)
+        return answer
+    
+    @staticmethod
+    def _answer_cache_key(
+        question_vector: Sequence[float],
+        documents: List[Document],
+        chat_history: str
+    ) -> tuple:
+        """
+        Build the answer cache key for a question.
+        
+        The conversation history is part of the key because it is part of the
+        prompt: a follow-up such as "and the second one?" can retrieve the same
+        documents as an earlier question yet needs a different answer. Hits
+        therefore come mostly from questions asked with the same (typically
+        empty) history, such as common opening questions across sessions.
+        
+        Args:
+            question_vector: Embedding of the question
+            documents: Documents retrieved for the question
+            chat_history: Conversation history included in the prompt
+            
+        Returns:
+            Key combining the retrieved documents, the coarsely quantized
+            question vector and the conversation history
+        """
+        quantized = np.round(np.asarray(question_vector, dtype=np.float32) * 32)
+        quantized = np.clip(quantized, -128, 127).astype(np.int8).tobytes()
+        doc_keys = tuple(sorted(hash(doc.page_content) for doc in documents))
+        return doc_keys, quantized, chat_history
+    
+    def _get_cached_answer(self, key: tuple) -> Optional[str]:
+        """Return a cached answer that has not expired, or None."""
+        entry = self._answer_cache.get(key)
+        if entry is None:
+            return None
+        
+        stored_at, answer = entry
+        if time.monotonic() - stored_at > ANSWER_CACHE_TTL_SECONDS:
+            del self._answer_cache[key]
+            return None
+        
+        self._answer_cache.move_to_end(key)
+        return answer
+    
+    def _cache_answer(self, key: tuple, answer: str) -> None:
+        """Store an answer, evicting the least recently used entry when full."""
+        self._answer_cache[key] = (time.monotonic(), answer)
+        self._answer_cache.move_to_end(key)
+        if len(self._answer_cache) > ANSWER_CACHE_MAXSIZE:
+            self._answer_cache.popitem(last=False)
+    
+    def _get_cached_documents(self, question: str) -> Optional[List[Document]]:
+        """Return a copy of the documents cached for a question, or None."""
+        entry = self._retrieval_cache.get(question)
+        if entry is None:
+            return None
+        
+        stored_at, documents = entry
+        if time.monotonic() - stored_at > RETRIEVAL_CACHE_TTL_SECONDS:
+            del self._retrieval_cache[question]
+            return None
+        
+        self._retrieval_cache.move_to_end(question)
+        return list(documents)
+    
+    def _cache_documents(self, question: str, documents: List[Document]) -> None:
+        """Store retrieved documents, evicting the least recently used entry when full."""
+        self._retrieval_cache[question] = (time.monotonic(), list(documents))
+        self._retrieval_cache.move_to_end(question)
+        if len(self._retrieval_cache) > RETRIEVAL_CACHE_MAXSIZE:
+            self._retrieval_cache.popitem(last=False)
     
     async def _retrieve_documents(self, question: str) -> List[Document]:
         """
@@ -153,26 +680,116 @@ Answer:"""
         Returns:
             List of relevant documents
         """
+        cached_documents = self._get_cached_documents(question)
+        if cached_documents is not None:
+            return cached_documents
+        
         try:
-            # Use async retrieval if available
-            if hasattr(self.retriever, 'aget_relevant_documents'):
-                return await self.retriever.aget_relevant_documents(question)
+            if self.additional_retrievers:
+                documents = await self._retrieve_fused(question)
             else:
-                # Fallback to sync retrieval (run in thread pool)
-                loop = asyncio.get_event_loop()
-                return await loop.run_in_executor(
-                    None, 
-                    self.retriever.get_relevant_documents, 
-                    question
-                )
+                documents = await self._search_vector_store(question)
         except Exception as e:
             logger.error(f"Error retrieving documents: {str(e)}")
             return []
+        
+        self._cache_documents(question, documents)
+        return documents
+    
+    async def _retrieve_fused(self, question: str) -> List[Document]:
+        """
+        Query the vector store and the additional retrievers concurrently.
+        
+        Latency is that of the slowest retriever rather than the sum. A failing
+        additional retriever is skipped; results are merged by reciprocal rank
+        fusion.
+        
+        Args:
+            question: User's question
+            
+        Returns:
+            Fused list of at most `retriever_k` documents
+        """
+        results = await asyncio.gather(
+            self._search_vector_store(question),
+            *(self._search_retriever(retriever, question) for retriever in self.additional_retrievers),
+            return_exceptions=True
+        )
+        
+        ranked_lists = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning(f"Error in retriever, skipping its results: {str(result)}")
+                continue
+            ranked_lists.append(result)
+        
+        if not ranked_lists:
+            raise results[0]
+        
+        return _reciprocal_rank_fusion(ranked_lists, self.config.retriever_k)
+    
+    async def _search_vector_store(self, question: str) -> List[Document]:
+        """
+        Search the vector store for the question.
+        
+        Args:
+            question: User's question
+            
+        Returns:
+            Documents ranked by similarity
+        """
+        if self.embeddings is None:
+            return await self._search_retriever(self.retriever, question)
+        
+        # Embed through the cache and search by vector, so repeated
+        # questions skip the embedding API round trip
+        query_vector = await self.embeddings.aembed_query(question)
+        
+        # Paraphrases of an earlier question skip the vector search
+        documents = self._semantic_cache.get(query_vector)
+        if documents is not None:
+            return list(documents)
+        
+        loop = asyncio.get_running_loop()
+        documents = await loop.run_in_executor(
+            self._retrieve_pool,
+            partial(self.vector_store.similarity_search_by_vector, query_vector, k=self.config.retriever_k)
+        )
+        self._semantic_cache.put(query_vector, list(documents))
+        return documents
+    
+    async def _search_retriever(self, retriever: Any, question: str) -> List[Document]:
+        """
+        Run a LangChain retriever, off the event loop if it has no async API.
+        
+        Args:
+            retriever: Retriever to query
+            question: User's question
+            
+        Returns:
+            Documents returned by the retriever
+        """
+        # Use async retrieval if available
+        if hasattr(retriever, 'aget_relevant_documents'):
+            return await retriever.aget_relevant_documents(question)
+        
+        # Fallback to sync retrieval (run in the retrieval pool)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._retrieve_pool, 
+            retriever.get_relevant_documents, 
+            question
+        )
     
     def _prepare_context(self, documents: List[Document]) -> str:
         """
         Prepare context string from retrieved documents.
         
+        Documents are sorted by source and position and labelled with a
+        content-derived ID rather than their rank, so the same documents
+        always produce the same context text and prompt prefix. Chunks whose
+        content repeats one already included are left out.
+        
         Args:
             documents: Retrieved documents
             
@@ -183,16 +800,46 @@ Answer:"""
             return "No relevant context found in the knowledge base."
         
         context_parts = []
-        for i, doc in enumerate(documents, 1):
-            # Include document metadata if available
-            source = doc.metadata.get('source', f'Document {i}')
-            page = doc.metadata.get('page', '')
-            page_info = f" (Page {page})" if page else ""
+        seen: Set[int] = set()
+        for doc in sorted(documents, key=self._document_sort_key):
+            # Skip duplicates before any formatting work
+            fingerprint = _content_fingerprint(doc.page_content)
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
             
-            context_parts.append(f"[Source {i} - {source}{page_info}]:\n{doc.page_content}\n")
+            # Include document metadata if available; the same pages recur
+            # across a conversation, so their labels are formatted once
+            header_key = (doc.metadata.get('source', 'Document'), doc.metadata.get('page', ''))
+            label = self._header_cache.get(header_key)
+            if label is None:
+                source, page = header_key
+                page_info = f" (Page {page})" if page else ""
+                label = sys.intern(f"{source}{page_info}")
+                self._header_cache[header_key] = label
+            doc_id = hashlib.blake2b(doc.page_content.encode("utf-8"), digest_size=4).hexdigest()
+            
+            context_parts.append(f"<DOC id={doc_id} | {label}>\n{doc.page_content}\n")
         
         return "\n".join(context_parts)
     
+    @staticmethod
+    def _document_sort_key(doc: Document) -> Tuple[str, int, int]:
+        """Order documents by source, page and position within the page."""
+        metadata = doc.metadata
+        
+        def as_int(value: Any) -> int:
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return 0
+        
+        return (
+            str(metadata.get('source', '')),
+            as_int(metadata.get('page', 0)),
+            as_int(metadata.get('start_index', 0))
+        )
+    
     async def _stream_llm_response(
         self, 
         question: str, 
@@ -211,15 +858,25 @@ Answer:"""
             String chunks of the response
         """
         try:
-            # Format the prompt
-            formatted_prompt = self.prompt.format(
-                question=question,
-                context=context,
-                chat_history=chat_history
-            )
+            # Format the per-question prompt after the fixed system message
+            messages = [
+                self.system_message,
+                HumanMessage(content=self.prompt.format(
+                    question=question,
+                    context=context,
+                    chat_history=chat_history
+                ))
+            ]
+            
+            # LangChain's LLM cache is bypassed by astream, so with a cache
+            # enabled tokens are streamed through callbacks of a cached call
+            if self.config.llm_cache_backend != "none":
+                async for token in self._invoke_llm_streaming(messages):
+                    yield token
+                return
             
             # Stream the response
-            async for chunk in self.llm.astream(formatted_prompt):
+            async for chunk in self.llm.astream(messages):
                 if hasattr(chunk, 'content'):
                     yield chunk.content
                 else:
@@ -227,7 +884,49 @@ Answer:"""
                     
         except Exception as e:
             logger.error(f"Error streaming LLM response: {str(e)}")
-            yield f"Error generating response: {str(e)}"
+            yield f"{LLM_ERROR_PREFIX}{str(e)}"
+    
+    async def _invoke_llm_streaming(self, messages: List[Any]) -> AsyncIterator[str]:
+        """
+        Call the LLM through the LLM cache while streaming its tokens.
+        
+        Tokens generated by the model arrive through a callback handler; a
+        cache hit produces no tokens, so the cached answer is yielded whole.
+        
+        Args:
+            messages: Chat messages to send
+            
+        Yields:
+            String chunks of the response
+        """
+        queue: "asyncio.Queue[str]" = asyncio.Queue()
+        task = asyncio.ensure_future(
+            self.llm.ainvoke(messages, config={"callbacks": [_TokenQueueHandler(queue)]})
+        )
+        streamed = False
+        
+        try:
+            while True:
+                next_token = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({next_token, task}, return_when=asyncio.FIRST_COMPLETED)
+                if next_token not in done:
+                    next_token.cancel()
+                    break
+                streamed = True
+                yield next_token.result()
+            
+            # Tokens queued just before the call returned
+            while not queue.empty():
+                streamed = True
+                yield queue.get_nowait()
+            
+            if not streamed:
+                yield task.result().content
+            else:
+                task.result()
+        finally:
+            if not task.done():
+                task.cancel()
     
     def get_source_documents(self, question: str) -> List[Document]:
         """
@@ -245,6 +944,25 @@ Answer:"""
             logger.error(f"Error getting source documents: {str(e)}")
             return []
     
+    async def aget_source_documents(self, question: str) -> List[Document]:
+        """
+        Get source documents for a question without blocking the event loop.
+        
+        Uses the retriever's async API when it has one, otherwise runs the
+        synchronous retriever in the retrieval thread pool.
+        
+        Args:
+            question: User's question
+            
+        Returns:
+            List of relevant documents
+        """
+        try:
+            return await self._search_retriever(self.retriever, question)
+        except Exception as e:
+            logger.error(f"Error getting source documents: {str(e)}")
+            return []
+    
     def update_vector_store(self, vector_store: Chroma) -> None:
         """
         Update the vector store used by the RAG engine.
@@ -253,22 +971,25 @@ Answer:"""
             vector_store: New vector store to use
         """
         self.vector_store = vector_store
+        self.embeddings = self._get_query_embeddings(vector_store)
+        self._answer_cache.clear()
+        self._retrieval_cache.clear()
+        self._semantic_cache.clear()
+        self._count_cache = None
+        self._stats_time = None
+        self._header_cache.clear()
         self.retriever = vector_store.as_retriever(
             search_type="similarity",
-            search_kwargs={"k": 4}
-        )
-        
-        # Update the retrieval chain
-        self.chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.retriever,
-            memory=self.conversation_manager.memory,
-            return_source_documents=True,
-            verbose=True
+            search_kwargs={"k": self.config.retriever_k}
         )
         
         logger.info("Updated RAG engine with new vector store")
     
+    def close(self) -> None:
+        """Shut down the retrieval thread pool; the engine must not be used afterwards."""
+        self._retrieve_pool.shutdown(wait=False)
+        logger.debug("Closed RAG engine retrieval pool")
+    
     def get_engine_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the RAG engine.
@@ -276,22 +997,28 @@ Answer:"""
         Returns:
             Dictionary containing engine statistics
         """
+        now = time.monotonic()
+        if self._stats_time is not None and now - self._stats_time < STATS_CACHE_TTL_SECONDS:
+            return asdict(self._stats)
+        
         try:
-            # Get vector store stats
-            collection = self.vector_store._collection
-            doc_count = collection.count() if collection else 0
+            # Get vector store stats, reusing a recent count
+            if self._count_cache is None or now - self._count_cache[0] > COUNT_CACHE_TTL_SECONDS:
+                collection = self.vector_store._collection
+                self._count_cache = (now, collection.count() if collection else 0)
+            doc_count = self._count_cache[1]
             
             # Get conversation stats
             conversation_stats = self.conversation_manager.get_conversation_summary()
             
-            return {
-                "model": self.config.openai_model,
-                "vector_store_documents": doc_count,
-                "retriever_k": self.retriever.search_kwargs.get("k", 0),
-                "conversation_active": conversation_stats.get("conversation_active", False),
-                "total_messages": conversation_stats.get("total_session_messages", 0),
-                "memory_limit": self.config.max_conversation_history
-            }
+            # Only the fields that can change are refreshed
+            stats = self._stats
+            stats.vector_store_documents = doc_count
+            stats.retriever_k = self.retriever.search_kwargs.get("k", 0)
+            stats.conversation_active = conversation_stats.get("conversation_active", False)
+            stats.total_messages = conversation_stats.get("total_session_messages", 0)
+            self._stats_time = now
+            return asdict(stats)
             
         except Exception as e:
             logger.error(f"Error getting engine stats: {str(e)}")
@@ -5,20 +5,66 @@ Handles knowledge base creation, document storage, and semantic search.
 
 import os
 import logging
-from typing import List, Optional, Dict, Any
+import re
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import List, Optional, Dict, Any, Set, Tuple
 from pathlib import Path
 
+import chromadb
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain.schema import Document
 
+from core.faiss_store import HAS_FAISS, FaissVectorStore, list_index_names, read_collection
 from utils.config import AppConfig
+from utils.embedding_cache import CachedEmbeddings, SQLiteEmbeddingStore
 
 logger = logging.getLogger(__name__)
 
+# Seconds a collection's document count is reused before asking Chroma again
+COUNT_CACHE_TTL_SECONDS = 5.0
+
+# Seconds the cached collection listing is trusted; other sessions create and
+# delete knowledge bases through their own managers
+KB_NAMES_TTL_SECONDS = 5.0
+
+EMBEDDING_MODEL = "text-embedding-3-small"  # Using smaller model for efficiency
+QUERY_EMBEDDINGS_FILENAME = "query_embeddings.sqlite3"
+
+# Subdirectory of the persist directory holding FAISS knowledge bases
+FAISS_DIRNAME = "faiss"
+
+# HNSW write buffering applied when a collection is created; the graph
+# parameters themselves come from the configuration
+HNSW_BATCH_SIZE = 1000
+HNSW_SYNC_THRESHOLD = 10000
+
+# Collection name sanitizing: whitespace becomes "_", and any other character
+# Chroma does not accept is replaced too and marks the name with a "kb_" prefix
+_WHITESPACE_RE = re.compile(r"\s")
+_INVALID_NAME_CHARS_RE = re.compile(r"[^a-z0-9_\-]")
+
+
+@lru_cache(maxsize=256)
+def _sanitize_name(name: str) -> str:
+    """Sanitize a knowledge base name; cached because names repeat on every rerun."""
+    sanitized = _WHITESPACE_RE.sub("_", name.strip().lower())
+    sanitized, replaced = _INVALID_NAME_CHARS_RE.subn("_", sanitized)
+    
+    # Mark names that lost characters, and ensure it starts with a letter or number
+    if sanitized and (replaced or not sanitized[0].isalnum()):
+        sanitized = "kb_" + sanitized
+    
+    # Ensure it's not empty
+    return sanitized or "default_kb"
+
 
 class VectorStoreManager:
-    """Manages Chroma vector database operations for knowledge bases."""
+    """Manages Chroma (or FAISS) vector database operations for knowledge bases."""
     
     def __init__(self, config: Optional[AppConfig] = None):
         """Initialize vector store manager with configuration."""
@@ -30,11 +76,40 @@ class VectorStoreManager:
         self.persist_directory = Path(config.chroma_persist_dir)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         
-        # Initialize OpenAI embeddings
+        # Knowledge bases are either Chroma collections or FAISS index directories
+        self.use_faiss = config.vector_backend.lower() == "faiss"
+        if self.use_faiss and not HAS_FAISS:
+            raise ImportError("vector_backend 'faiss' requires the faiss-cpu package")
+        self.faiss_directory = self.persist_directory / FAISS_DIRNAME
+        
+        # Collection name -> (monotonic time, document count)
+        self._count_cache: Dict[str, Tuple[float, int]] = {}
+        
+        # Names of existing collections, loaded on first use and kept up to
+        # date by create and delete; misses and expired listings are refreshed
+        self._kb_names: Optional[Set[str]] = None
+        self._kb_names_time = 0.0
+        
+        # One client shared by every Chroma store and existence check
+        self._client = chromadb.PersistentClient(path=str(self.persist_directory))
+        
+        # Initialize OpenAI embeddings; query vectors are cached (and persisted
+        # across restarts) so repeated questions skip the embedding API
         try:
-            self.embeddings = OpenAIEmbeddings(
-                openai_api_key=config.openai_api_key,
-                model="text-embedding-3-small"  # Using smaller model for efficiency
+            store = None
+            if config.persist_query_embeddings:
+                store = SQLiteEmbeddingStore(
+                    str(self.persist_directory / QUERY_EMBEDDINGS_FILENAME),
+                    EMBEDDING_MODEL
+                )
+            
+            self.embeddings = CachedEmbeddings(
+                OpenAIEmbeddings(
+                    openai_api_key=config.openai_api_key,
+                    model=EMBEDDING_MODEL,
+                    chunk_size=config.embedding_batch_size
+                ),
+                store=store
             )
             logger.info("Initialized OpenAI embeddings")
         except Exception as e:
@@ -52,7 +127,7 @@ class VectorStoreManager:
             documents: List of Document objects to store
             
         Returns:
-            Chroma vector store instance
+            Chroma vector store instance (FaissVectorStore with the FAISS backend)
             
         Raises:
             ValueError: If knowledge base name is invalid or already exists
@@ -73,20 +148,30 @@ class VectorStoreManager:
         try:
             logger.info(f"Creating knowledge base '{name}' with {len(documents)} documents")
             
-            vector_store = Chroma(
-                collection_name=collection_name,
-                embedding_function=self.embeddings,
-                persist_directory=str(self.persist_directory)
-            )
+            if self.use_faiss:
+                vector_store = FaissVectorStore(collection_name, self.embeddings)
+            else:
+                vector_store = self._open_collection(collection_name, self._hnsw_metadata())
             
-            # Add documents to the vector store
-            vector_store.add_documents(documents)
+            # Add documents to the vector store; the name is only registered
+            # once the documents are written
+            self._add_documents_in_batches(vector_store, documents)
+            self._count_cache.pop(collection_name, None)
+            if self._kb_names is not None:
+                self._kb_names.add(collection_name)
             
             logger.info(f"Successfully created knowledge base '{name}' with collection '{collection_name}'")
             return vector_store
             
         except Exception as e:
             logger.error(f"Error creating knowledge base '{name}': {str(e)}")
+            
+            # Drop the partially written collection so the name can be reused;
+            # empty collections are hidden from the listing and could not be deleted
+            try:
+                self._remove_collection(collection_name)
+            except Exception as cleanup_error:
+                logger.debug(f"Could not remove failed knowledge base '{name}': {str(cleanup_error)}")
             raise
     
     def get_knowledge_base(self, name: str) -> Optional[Chroma]:
@@ -106,11 +191,13 @@ class VectorStoreManager:
             return None
         
         try:
-            vector_store = Chroma(
-                collection_name=collection_name,
-                embedding_function=self.embeddings,
-                persist_directory=str(self.persist_directory)
-            )
+            if self.use_faiss:
+                # Memory-mapped, so opening a large index does not read it all
+                vector_store = FaissVectorStore.load(
+                    collection_name, self.faiss_directory / collection_name, self.embeddings
+                )
+            else:
+                vector_store = self._open_collection(collection_name)
             
             logger.info(f"Successfully loaded knowledge base '{name}'")
             return vector_store
@@ -132,27 +219,18 @@ class VectorStoreManager:
         collection_name = self._sanitize_collection_name(name)
         
         try:
-            # Try to create a temporary Chroma instance to check if collection exists
-            temp_chroma = Chroma(
-                collection_name=collection_name,
-                embedding_function=self.embeddings,
-                persist_directory=str(self.persist_directory)
-            )
-            
-            # Check if the collection has any documents
-            # If it doesn't exist, this will create an empty collection
-            collection = temp_chroma._collection
-            count = collection.count()
-            
-            # If count is 0, it might be a new collection, so we delete it
-            if count == 0:
-                try:
-                    collection.delete()
-                    return False
-                except:
-                    pass
-            
-            return count > 0
+            # Look the name up in the collection listing; opening the
+            # collection through Chroma would create it as a side effect.
+            # Knowledge bases created or deleted by other sessions are picked
+            # up by listing again on a miss or once the cached listing expires
+            names = self._kb_names
+            if (
+                names is None
+                or collection_name not in names
+                or time.monotonic() - self._kb_names_time > KB_NAMES_TTL_SECONDS
+            ):
+                names = self._refresh_kb_names()
+            return collection_name in names
             
         except Exception as e:
             logger.debug(f"Error checking knowledge base existence for '{name}': {str(e)}")
@@ -172,24 +250,19 @@ class VectorStoreManager:
             if not self.persist_directory.exists():
                 return knowledge_bases
             
-            # Import ChromaDB client to list collections
-            import chromadb
-            
-            # Create a client to access the database
-            client = chromadb.PersistentClient(path=str(self.persist_directory))
-            
             # List all collections
-            collections = client.list_collections()
-            
-            for collection in collections:
+            collection_names = sorted(self._refresh_kb_names())
+            for collection_name in collection_names:
                 try:
+                    if self.use_faiss:
+                        collection = read_collection(collection_name, self.faiss_directory / collection_name)
+                    else:
+                        collection = self._client.get_collection(collection_name)
+                    
                     # Get collection info
-                    count = collection.count()
+                    count = self._get_collection_count(collection)
                     
                     if count > 0:
-                        # Try to get metadata or use collection name
-                        collection_name = collection.name
-                        
                         # Convert sanitized name back to display name
                         display_name = collection_name.replace('_', ' ').title()
                         
@@ -201,7 +274,7 @@ class VectorStoreManager:
                         })
                         
                 except Exception as e:
-                    logger.debug(f"Could not get info for collection {collection.name}: {e}")
+                    logger.debug(f"Could not get info for collection {collection_name}: {e}")
                     continue
             
             logger.info(f"Found {len(knowledge_bases)} knowledge bases")
@@ -228,15 +301,8 @@ class VectorStoreManager:
                 logger.warning(f"Cannot delete knowledge base '{name}' - it doesn't exist")
                 return False
             
-            # Load the collection and delete it
-            chroma = Chroma(
-                collection_name=collection_name,
-                embedding_function=self.embeddings,
-                persist_directory=str(self.persist_directory)
-            )
-            
-            collection = chroma._collection
-            collection.delete()
+            # Delete the collection itself
+            self._remove_collection(collection_name)
             
             logger.info(f"Successfully deleted knowledge base '{name}'")
             return True
@@ -256,13 +322,21 @@ class VectorStoreManager:
         Returns:
             True if documents were added successfully, False otherwise
         """
-        vector_store = self.get_knowledge_base(name)
+        if self.use_faiss and self.knowledge_base_exists(name):
+            # Memory-mapped indexes are read-only, so load this one into memory
+            collection_name = self._sanitize_collection_name(name)
+            vector_store = FaissVectorStore.load(
+                collection_name, self.faiss_directory / collection_name, self.embeddings, mmap=False
+            )
+        else:
+            vector_store = self.get_knowledge_base(name)
         if not vector_store:
             logger.error(f"Cannot add documents to non-existent knowledge base '{name}'")
             return False
         
         try:
-            vector_store.add_documents(documents)
+            self._add_documents_in_batches(vector_store, documents)
+            self._count_cache.pop(self._sanitize_collection_name(name), None)
             logger.info(f"Successfully added {len(documents)} documents to knowledge base '{name}'")
             return True
             
@@ -270,6 +344,167 @@ class VectorStoreManager:
             logger.error(f"Error adding documents to knowledge base '{name}': {str(e)}")
             return False
     
+    def _remove_collection(self, collection_name: str) -> None:
+        """
+        Delete a collection (or FAISS index directory) and forget its cached state.
+        
+        Args:
+            collection_name: Sanitized collection name
+        """
+        self._count_cache.pop(collection_name, None)
+        if self._kb_names is not None:
+            self._kb_names.discard(collection_name)
+        
+        if self.use_faiss:
+            shutil.rmtree(self.faiss_directory / collection_name, ignore_errors=True)
+        else:
+            self._client.delete_collection(collection_name)
+    
+    def _open_collection(self, collection_name: str, collection_metadata: Optional[Dict[str, Any]] = None) -> Chroma:
+        """
+        Create a Chroma store for a collection using the shared client.
+        
+        Args:
+            collection_name: Sanitized collection name
+            collection_metadata: Metadata (including HNSW settings) used if the
+                collection does not exist yet; existing collections keep theirs
+        
+        Returns:
+            Chroma vector store instance
+        """
+        return Chroma(
+            collection_name=collection_name,
+            embedding_function=self.embeddings,
+            client=self._client,
+            collection_metadata=collection_metadata
+        )
+    
+    def _hnsw_metadata(self) -> Dict[str, Any]:
+        """
+        Build the HNSW index settings for a new collection.
+        
+        Chroma's defaults (M=16, search_ef=10) lose recall and slow down
+        noticeably on large collections, so they are set explicitly.
+        
+        Returns:
+            Collection metadata with HNSW settings
+        """
+        return {
+            "hnsw:space": "cosine",
+            "hnsw:M": self.config.hnsw_m,
+            "hnsw:construction_ef": self.config.hnsw_construction_ef,
+            "hnsw:search_ef": self.config.hnsw_search_ef,
+            "hnsw:batch_size": HNSW_BATCH_SIZE,
+            "hnsw:sync_threshold": HNSW_SYNC_THRESHOLD,
+        }
+    
+    def _list_collection_names(self) -> List[str]:
+        """
+        List the names of all collections in the database.
+        
+        Returns:
+            Collection names; newer chromadb versions return names directly,
+            older ones return collection objects
+        """
+        if self.use_faiss:
+            return list_index_names(self.faiss_directory)
+        return [getattr(collection, "name", collection) for collection in self._client.list_collections()]
+    
+    def _refresh_kb_names(self) -> Set[str]:
+        """
+        Reload the cached set of collection names from storage.
+        
+        Returns:
+            Names of all existing collections
+        """
+        self._kb_names = set(self._list_collection_names())
+        self._kb_names_time = time.monotonic()
+        return self._kb_names
+    
+    def _add_documents_in_batches(self, vector_store: Chroma, documents: List[Document]) -> None:
+        """
+        Embed and store documents in fixed-size batches.
+        
+        Each batch is embedded with one embeddings request and written to
+        Chroma separately, which bounds memory use on large uploads and keeps
+        writes under Chroma's maximum batch size. The next batch is embedded
+        in the background while the current one is written, and the vectors
+        are passed to the collection directly so Chroma does not embed again.
+        FAISS stores are written to disk once all batches are added.
+        
+        Args:
+            vector_store: Vector store to add the documents to
+            documents: Documents to add
+        """
+        batch_size = max(1, self.config.embedding_batch_size)
+        batches = [documents[start:start + batch_size] for start in range(0, len(documents), batch_size)]
+        if not batches:
+            return
+        
+        if isinstance(vector_store, FaissVectorStore):
+            write_batch = vector_store.add_document_vectors
+        else:
+            write_batch = partial(self._write_batch, vector_store._collection)
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-embed") as pool:
+            pending = pool.submit(self._embed_batch, batches[0])
+            for index, batch in enumerate(batches):
+                vectors = pending.result()
+                if index + 1 < len(batches):
+                    pending = pool.submit(self._embed_batch, batches[index + 1])
+                write_batch(batch, vectors)
+        
+        if isinstance(vector_store, FaissVectorStore):
+            vector_store.save(self.faiss_directory / vector_store.name)
+    
+    def _embed_batch(self, batch: List[Document]) -> List[List[float]]:
+        """Embed the page contents of a batch with one embeddings request."""
+        return self.embeddings.embed_documents([doc.page_content for doc in batch])
+    
+    def _write_batch(self, collection, batch: List[Document], vectors: List[List[float]]) -> None:
+        """
+        Write a batch of documents with precomputed vectors to a collection.
+        
+        Chroma rejects empty metadata dicts, so documents without metadata are
+        written in a separate call that omits metadatas.
+        
+        Args:
+            collection: Chroma collection
+            batch: Documents to write
+            vectors: Embedding vectors, one per document
+        """
+        with_metadata = [i for i, doc in enumerate(batch) if doc.metadata]
+        without_metadata = [i for i, doc in enumerate(batch) if not doc.metadata]
+        
+        for indices, include_metadata in ((with_metadata, True), (without_metadata, False)):
+            if not indices:
+                continue
+            collection.add(
+                ids=[str(uuid.uuid4()) for _ in indices],
+                embeddings=[vectors[i] for i in indices],
+                documents=[batch[i].page_content for i in indices],
+                metadatas=[batch[i].metadata for i in indices] if include_metadata else None
+            )
+    
+    def _get_collection_count(self, collection) -> int:
+        """
+        Get a collection's document count, reusing a recent value.
+        
+        Args:
+            collection: Chroma collection
+            
+        Returns:
+            Number of documents in the collection
+        """
+        now = time.monotonic()
+        cached = self._count_cache.get(collection.name)
+        if cached is not None and now - cached[0] <= COUNT_CACHE_TTL_SECONDS:
+            return cached[1]
+        
+        count = collection.count()
+        self._count_cache[collection.name] = (now, count)
+        return count
+    
     def _sanitize_collection_name(self, name: str) -> str:
         """
         Sanitize collection name to meet Chroma requirements.
@@ -281,17 +516,7 @@ class VectorStoreManager:
             Sanitized collection name
         """
         # Chroma collection names must be alphanumeric with underscores and hyphens
-        sanitized = "".join(c if c.isalnum() or c in "-_" else "_" for c in name.strip())
-        
-        # Ensure it starts with a letter or number
-        if sanitized and not sanitized[0].isalnum():
-            sanitized = "kb_" + sanitized
-        
-        # Ensure it's not empty
-        if not sanitized:
-            sanitized = "default_kb"
-        
-        return sanitized.lower()
+        return _sanitize_name(name)
     
     def get_knowledge_base_stats(self, name: str) -> Optional[Dict[str, Any]]:
         """
@@ -309,7 +534,7 @@ class VectorStoreManager:
         
         try:
             collection = vector_store._collection
-            count = collection.count()
+            count = self._get_collection_count(collection)
             
             return {
                 'name': name,
@@ -3,7 +3,8 @@ Configuration management for the RAG Chatbot Platform.
 Handles environment variables and application settings.
 """
 
-import os
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -21,11 +22,29 @@ class AppConfig(BaseSettings):
         default="data/knowledge_bases", 
         description="Directory for Chroma database persistence"
     )
+    hnsw_m: int = Field(default=32, description="HNSW graph links per node for new collections")
+    hnsw_construction_ef: int = Field(default=200, description="HNSW candidate list size while indexing")
+    hnsw_search_ef: int = Field(default=64, description="HNSW candidate list size while searching")
+    vector_backend: str = Field(
+        default="chroma",
+        description="Knowledge base storage: chroma, or faiss (exact flat index, suited to knowledge bases under ~100k chunks)"
+    )
+    persist_query_embeddings: bool = Field(
+        default=True,
+        description="Keep query embeddings in a SQLite file next to the Chroma database"
+    )
     
     # Document processing parameters
     chunk_size: int = Field(default=1000, description="Text chunk size for document splitting")
     chunk_overlap: int = Field(default=200, description="Overlap between text chunks")
     
+    embedding_batch_size: int = Field(
+        default=100,
+        description="Number of document chunks embedded and stored per batch"
+    )
+    
+    retriever_k: int = Field(default=4, description="Number of document chunks retrieved per question")
+    
     # Conversation management
     max_conversation_history: int = Field(
         default=3, 
@@ -35,11 +54,27 @@ class AppConfig(BaseSettings):
     # File upload settings
     upload_dir: str = Field(default="data/uploads", description="Temporary upload directory")
     max_file_size_mb: int = Field(default=200, description="Maximum file size in MB")
+    chunk_cache_max_mb: int = Field(
+        default=100,
+        description="Maximum size of the on-disk cache of chunked documents in MB (0 disables it)"
+    )
     
     # Streamlit settings
     page_title: str = Field(default="RAG Chatbot Platform", description="Page title for Streamlit app")
     page_layout: str = Field(default="wide", description="Page layout for Streamlit app")
     
+    prefetch_followups: bool = Field(
+        default=False,
+        description="After each answer, predict likely follow-up questions and prefetch their documents"
+    )
+    llm_cache_backend: str = Field(
+        default="none",
+        description="LangChain LLM response cache: none, memory or sqlite (stored next to the Chroma database)"
+    )
+    
+    # Debugging
+    debug_chains: bool = Field(default=False, description="Log LangChain model calls verbosely")
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -48,17 +83,25 @@ class AppConfig(BaseSettings):
     )
 
 
+@lru_cache(maxsize=1)
 def get_config() -> AppConfig:
-    """Get application configuration instance."""
+    """
+    Get the application configuration instance.
+    
+    The configuration is parsed from the environment and `.env` once per
+    process and shared afterwards, since Streamlit re-executes the script on
+    every widget interaction. Call `get_config.cache_clear()` to force a reload.
+    """
     return AppConfig()
 
 
 def ensure_directories_exist(config: AppConfig) -> None:
     """Ensure required directories exist, create if they don't."""
-    directories = [
-        config.chroma_persist_dir,
-        config.upload_dir
-    ]
-    
+    _ensure_directories(config.chroma_persist_dir, config.upload_dir)
+
+
+@lru_cache(maxsize=None)
+def _ensure_directories(*directories: str) -> None:
+    """Create each directory once per process; later calls are cache hits."""
     for directory in directories:
-        os.makedirs(directory, exist_ok=True)
\ No newline at end of file
+        Path(directory).mkdir(parents=True, exist_ok=True)
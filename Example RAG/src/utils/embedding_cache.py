@@ -0,0 +1,310 @@
+"""
+Embedding cache for query vectors.
+Wraps an embeddings model so repeated questions skip the embedding API, and
+batches concurrent cache misses into a single embedding request. Vectors can
+also be persisted in SQLite so the cache survives restarts.
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteEmbeddingStore:
+    """
+    Persistent query embedding table backed by SQLite.
+    
+    Vectors are stored as float16, halving their size with negligible effect
+    on similarity ranking. The database uses WAL mode so several processes
+    can share one file.
+    """
+    
+    def __init__(self, path: str, model: str):
+        """
+        Open (or create) the embedding table.
+        
+        Args:
+            path: Path of the SQLite database file
+            model: Embedding model name; entries from other models never match
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self.path = path
+        self.model = model
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb (hash BLOB PRIMARY KEY, model TEXT, vec BLOB)"
+        )
+        self._conn.commit()
+    
+    def _key(self, text: str) -> bytes:
+        """Hash the model name and text into the table key."""
+        return hashlib.blake2b(f"{self.model}\0{text}".encode("utf-8"), digest_size=16).digest()
+    
+    def get(self, text: str) -> Optional[List[float]]:
+        """
+        Look up a stored vector.
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            The stored vector, or None if the text has not been embedded before
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT vec FROM emb WHERE hash = ?", (self._key(text),)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float16).astype(np.float32).tolist()
+    
+    def put(self, text: str, vector: List[float]) -> None:
+        """
+        Store a vector.
+        
+        Args:
+            text: Query text
+            vector: Embedding vector for the text
+        """
+        blob = np.asarray(vector, dtype=np.float16).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO emb (hash, model, vec) VALUES (?, ?, ?)",
+                (self._key(text), self.model, blob)
+            )
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent query embeddings on one event loop into batched calls.
+    
+    Requests arriving within max_wait seconds of the first one in a batch are
+    sent together as a single `aembed_documents` request. The worker task
+    exits once the queue is drained and is restarted by the next request.
+    """
+    
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 64, max_wait: float = 0.005):
+        """
+        Initialize the batcher for the running event loop.
+        
+        Args:
+            embeddings: Embeddings model used for the batched requests
+            max_batch_size: Maximum number of texts sent in one request
+            max_wait: Time in seconds to wait for more texts before sending
+        """
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query as part of the next batch.
+        
+        Args:
+            text: Query text
+            
+        Returns:
+            Embedding vector for the query
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        
+        return await future
+    
+    async def _run(self) -> None:
+        """Send queued texts in batches until the queue is empty."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            try:
+                batch = [self._queue.get_nowait()]
+            except asyncio.QueueEmpty:
+                return
+            
+            # Give concurrent requests a short window to join the batch
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Identical concurrent questions are embedded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = await self.embeddings.aembed_documents(texts)
+            except Exception as e:
+                logger.error(f"Error embedding batch of {len(texts)} queries: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            vectors_by_text = dict(zip(texts, vectors))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(vectors_by_text[text])
+            
+            logger.debug(f"Embedded {len(texts)} queries in one batch")
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that keeps an LRU cache of query vectors."""
+    
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        maxsize: int = 1024,
+        store: Optional[SQLiteEmbeddingStore] = None
+    ):
+        """
+        Initialize the cache around an embeddings model.
+        
+        Args:
+            embeddings: Underlying embeddings model used on cache misses
+            maxsize: Maximum number of query vectors to keep
+            store: Optional persistent store consulted before the embeddings model
+        """
+        self.embeddings = embeddings
+        self.maxsize = maxsize
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        
+        # Vectors are stored as tuples so cached entries cannot be mutated by callers
+        self._cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # One batcher per event loop, since asyncio queues and futures are loop-bound
+        self._batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EmbeddingBatcher]" = (
+            weakref.WeakKeyDictionary()
+        )
+    
+    def _get(self, text: str) -> Optional[List[float]]:
+        """Return a cached vector and mark it as recently used, or None on a miss."""
+        with self._lock:
+            vector = self._cache.get(text)
+            if vector is None:
+                self.misses += 1
+                return None
+            
+            self._cache.move_to_end(text)
+            self.hits += 1
+            return list(vector)
+    
+    def _put(self, text: str, vector: List[float]) -> None:
+        """Store a vector, evicting the least recently used entry when full."""
+        with self._lock:
+            self._cache[text] = tuple(vector)
+            self._cache.move_to_end(text)
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+    
+    def _load_persisted(self, text: str) -> Optional[List[float]]:
+        """Look a vector up in the persistent store, if there is one."""
+        if self.store is None:
+            return None
+        try:
+            return self.store.get(text)
+        except sqlite3.Error as e:
+            logger.warning(f"Error reading persisted query embedding: {str(e)}")
+            return None
+    
+    def _persist(self, text: str, vector: List[float]) -> None:
+        """Save a vector to the persistent store, if there is one."""
+        if self.store is None:
+            return
+        try:
+            self.store.put(text, vector)
+        except sqlite3.Error as e:
+            logger.warning(f"Error persisting query embedding: {str(e)}")
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query, serving repeated queries from the cache.
+        
+        Args:
+            text: Query text
+        
+        Returns:
+            Embedding vector for the query
+        """
+        vector = self._get(text)
+        if vector is None:
+            vector = self._load_persisted(text)
+            if vector is None:
+                vector = self.embeddings.embed_query(text)
+                self._persist(text, vector)
+            self._put(text, vector)
+        return vector
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Asynchronously embed a query, serving repeated queries from the cache.
+        
+        Cache misses on the same event loop are batched into one request.
+        
+        Args:
+            text: Query text
+        
+        Returns:
+            Embedding vector for the query
+        """
+        vector = self._get(text)
+        if vector is None:
+            vector = self._load_persisted(text)
+            if vector is None:
+                vector = await self._get_batcher().embed_query(text)
+                self._persist(text, vector)
+            self._put(text, vector)
+        return vector
+    
+    def _get_batcher(self) -> EmbeddingBatcher:
+        """Return the batcher for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            batcher = self._batchers.get(loop)
+            if batcher is None:
+                batcher = EmbeddingBatcher(self.embeddings)
+                self._batchers[loop] = batcher
+            return batcher
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents with the underlying model; document vectors are not cached."""
+        return self.embeddings.embed_documents(texts)
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronously embed documents with the underlying model."""
+        return await self.embeddings.aembed_documents(texts)
+    
+    def clear(self) -> None:
+        """Drop all cached query vectors."""
+        with self._lock:
+            self._cache.clear()
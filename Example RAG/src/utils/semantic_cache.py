@@ -0,0 +1,156 @@
+"""
+Approximate semantic cache keyed by embedding vectors.
+Uses random-hyperplane locality-sensitive hashing so that paraphrased
+questions with nearly identical embeddings can reuse earlier results.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.vecops import make_cosine, normalize
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    LRU cache that returns a stored value for any sufficiently similar vector.
+    
+    Each vector is hashed to a signature of `num_planes` bits, one per random
+    hyperplane, recording which side of the plane the vector falls on. Similar
+    vectors share most bits, so a lookup probes the vector's own bucket and
+    every bucket one bit away, then confirms candidates with an exact cosine
+    similarity check against the threshold.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        num_planes: int = 12,
+        maxsize: int = 4096,
+        seed: int = 0
+    ):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a cached entry to match
+            num_planes: Number of hyperplanes (signature bits)
+            maxsize: Maximum number of entries to keep
+            seed: Seed for the random hyperplanes
+        """
+        self.threshold = threshold
+        self.num_planes = num_planes
+        self.maxsize = maxsize
+        self.seed = seed
+        self.hits = 0
+        self.misses = 0
+        
+        # Hyperplanes and the similarity function are created on first use,
+        # once the vector dimension is known
+        self._planes: Optional[np.ndarray] = None
+        self._cosine: Optional[Callable[[np.ndarray, np.ndarray], float]] = None
+        self._bit_weights = 1 << np.arange(num_planes, dtype=np.int64)
+        
+        self._entries: "OrderedDict[int, Tuple[int, np.ndarray, Any]]" = OrderedDict()
+        self._buckets: Dict[int, Set[int]] = {}
+        self._next_id = 0
+        
+        # Reentrant because hashing may clear the cache when the dimension changes
+        self._lock = threading.RLock()
+    
+    def _normalize(self, vector: List[float]) -> Optional[np.ndarray]:
+        """Return the vector as a unit-length float32 array, or None for a zero vector."""
+        unit = normalize(vector)
+        if not unit.any():
+            return None
+        return unit
+    
+    def _signature(self, unit: np.ndarray) -> int:
+        """Pack the hyperplane sides of a vector into an integer signature."""
+        if self._planes is None or self._planes.shape[1] != unit.shape[0]:
+            # Entries hashed with hyperplanes of another dimension can never match
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal((self.num_planes, unit.shape[0])).astype(np.float32)
+            self._cosine = make_cosine(unit.shape[0])
+            self.clear()
+        
+        bits = (self._planes @ unit) > 0
+        return int(self._bit_weights[bits].sum())
+    
+    def _probe(self, signature: int) -> List[int]:
+        """Return entry ids in the signature's bucket and all buckets one bit away."""
+        candidates = list(self._buckets.get(signature, ()))
+        for bit in range(self.num_planes):
+            candidates.extend(self._buckets.get(signature ^ (1 << bit), ()))
+        return candidates
+    
+    def get(self, vector: List[float]) -> Optional[Any]:
+        """
+        Look up the value stored for the most similar cached vector.
+        
+        Args:
+            vector: Query embedding
+        
+        Returns:
+            The cached value if a stored vector meets the similarity threshold,
+            otherwise None
+        """
+        unit = self._normalize(vector)
+        if unit is None:
+            return None
+        
+        with self._lock:
+            best_id, best_similarity = None, self.threshold
+            for entry_id in self._probe(self._signature(unit)):
+                similarity = float(self._cosine(self._entries[entry_id][1], unit))
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            
+            if best_id is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+    
+    def put(self, vector: List[float], value: Any) -> None:
+        """
+        Store a value for a vector, evicting the least recently used entry when full.
+        
+        Args:
+            vector: Embedding the value belongs to
+            value: Value to return for similar vectors
+        """
+        unit = self._normalize(vector)
+        if unit is None:
+            return
+        
+        with self._lock:
+            signature = self._signature(unit)
+            entry_id = self._next_id
+            self._next_id += 1
+            
+            self._entries[entry_id] = (signature, unit, value)
+            self._buckets.setdefault(signature, set()).add(entry_id)
+            
+            if len(self._entries) > self.maxsize:
+                old_id, (old_signature, _, _) = self._entries.popitem(last=False)
+                bucket = self._buckets[old_signature]
+                bucket.discard(old_id)
+                if not bucket:
+                    del self._buckets[old_signature]
+    
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,125 @@
+"""
+Vector operations for embedding post-processing.
+Provides L2 normalization and cosine similarity compiled with Numba when it
+is installed, falling back to NumPy otherwise.
+"""
+
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    # Separate 1-D and 2-D kernels, each called with contiguous float32 input
+    # only, so every kernel compiles for exactly one array type
+    @njit(fastmath=True, cache=True)
+    def _normalize_1d(vector):
+        total = 0.0
+        for i in range(vector.shape[0]):
+            total += vector[i] * vector[i]
+        
+        out = np.zeros_like(vector)
+        if total > 0.0:
+            scale = 1.0 / np.sqrt(total)
+            for i in range(vector.shape[0]):
+                out[i] = vector[i] * scale
+        return out
+    
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _normalize_2d(matrix):
+        out = np.zeros_like(matrix)
+        for row in prange(matrix.shape[0]):
+            total = 0.0
+            for col in range(matrix.shape[1]):
+                total += matrix[row, col] * matrix[row, col]
+            if total > 0.0:
+                scale = 1.0 / np.sqrt(total)
+                for col in range(matrix.shape[1]):
+                    out[row, col] = matrix[row, col] * scale
+        return out
+
+else:
+    def _normalize_1d(vector):
+        norm = np.linalg.norm(vector)
+        if norm == 0.0:
+            return np.zeros_like(vector)
+        return vector / norm
+    
+    def _normalize_2d(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        return matrix / norms
+
+
+@lru_cache(maxsize=None)
+def make_cosine(dim: int) -> Callable[[np.ndarray, np.ndarray], float]:
+    """
+    Build a cosine similarity function specialized for one vector dimension.
+    
+    With Numba the dimension is a compile-time constant of the generated
+    kernel, so LLVM can unroll and vectorize the loop for it. Functions are
+    cached per dimension, since the embedding model fixes it.
+    
+    Args:
+        dim: Length of the vectors that will be compared
+        
+    Returns:
+        Function taking two float32 vectors of length dim and returning their
+        cosine similarity (0.0 if either is a zero vector)
+    """
+    if HAS_NUMBA:
+        @njit(fastmath=True)
+        def cosine(a, b):
+            dot = 0.0
+            norm_a = 0.0
+            norm_b = 0.0
+            for i in range(dim):
+                dot += a[i] * b[i]
+                norm_a += a[i] * a[i]
+                norm_b += b[i] * b[i]
+            if norm_a == 0.0 or norm_b == 0.0:
+                return 0.0
+            return dot / np.sqrt(norm_a * norm_b)
+        
+        return cosine
+    
+    def cosine(a, b):
+        norms = float(np.linalg.norm(a) * np.linalg.norm(b))
+        if norms == 0.0:
+            return 0.0
+        return float(np.dot(a, b)) / norms
+    
+    return cosine
+
+
+def normalize(vector) -> np.ndarray:
+    """
+    Scale a vector to unit L2 norm.
+    
+    Args:
+        vector: Sequence or array of numbers
+    
+    Returns:
+        Contiguous float32 unit vector; a zero vector is returned unchanged
+    """
+    return _normalize_1d(np.ascontiguousarray(vector, dtype=np.float32))
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    """
+    Scale each row of a matrix to unit L2 norm.
+    
+    Args:
+        matrix: 2-D sequence or array of numbers, one vector per row
+    
+    Returns:
+        Contiguous float32 matrix of unit rows; zero rows are returned unchanged
+    """
+    return _normalize_2d(np.ascontiguousarray(matrix, dtype=np.float32))
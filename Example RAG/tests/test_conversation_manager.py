@@ -0,0 +1,169 @@
+"""
+Unit tests for the conversation manager module.
+"""
+
+import pytest
+from pathlib import Path
+
+# Add src to path for testing
+import sys
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from core.conversation_manager import ConversationManager
+from utils.config import AppConfig
+
+
+class TestConversationManager:
+    """Test cases for ConversationManager class."""
+
+    @pytest.fixture
+    def config(self):
+        """Create test configuration."""
+        return AppConfig(
+            openai_api_key="test-key",
+            max_conversation_history=3
+        )
+
+    @pytest.fixture
+    def manager(self, config):
+        """Create ConversationManager instance."""
+        return ConversationManager(config)
+
+    def test_initialization(self, manager, config):
+        """Test conversation manager initialization."""
+        assert manager.config == config
+        assert manager.memory_size == config.max_conversation_history - 1
+        assert manager.get_session_messages() == []
+
+    def test_add_message(self, manager):
+        """Test adding a message exchange."""
+        manager.add_message("Hello", "Hi there")
+
+        messages = manager.get_session_messages()
+
+        assert [m["role"] for m in messages] == ["user", "assistant"]
+        assert [m["content"] for m in messages] == ["Hello", "Hi there"]
+
+    def test_session_messages_bounded(self, manager, config):
+        """Test that session messages keep only the most recent entries."""
+        for i in range(5):
+            manager.add_message(f"Question {i}", f"Answer {i}")
+
+        messages = manager.get_session_messages()
+
+        assert len(messages) == config.max_conversation_history
+        assert messages[-1]["content"] == "Answer 4"
+        assert messages[-2]["content"] == "Question 4"
+
+    def test_langchain_memory_bounded(self, manager):
+        """Test that LangChain memory only keeps the messages in its window."""
+        for i in range(5):
+            manager.add_message(f"Question {i}", f"Answer {i}")
+
+        history = manager.get_conversation_history()
+
+        assert len(history) == manager.memory_size * 2
+        assert history[-1].content == "Answer 4"
+
+    def test_add_user_and_ai_messages_bounded(self, manager, config):
+        """Test that single-message additions respect the history limit."""
+        for i in range(4):
+            manager.add_user_message(f"Question {i}")
+            manager.add_ai_message(f"Answer {i}")
+
+        messages = manager.get_session_messages()
+
+        assert len(messages) == config.max_conversation_history
+        assert messages[-1]["content"] == "Answer 3"
+
+    def test_get_session_messages_returns_copy(self, manager):
+        """Test that callers cannot mutate the internal history."""
+        manager.add_message("Hello", "Hi there")
+
+        messages = manager.get_session_messages()
+        messages.clear()
+
+        assert len(manager.get_session_messages()) == 2
+
+    def test_session_message_timestamps(self, manager):
+        """Test that ISO timestamps are only added when requested."""
+        manager.add_message("Hello", "Hi there")
+
+        raw = manager.get_session_messages()
+        formatted = manager.get_session_messages(iso_timestamps=True)
+
+        assert all(isinstance(m["ts"], int) for m in raw)
+        assert all("timestamp" not in m for m in raw)
+        assert all(isinstance(m["timestamp"], str) for m in formatted)
+
+    def test_clear_conversation(self, manager):
+        """Test clearing the conversation."""
+        manager.add_message("Hello", "Hi there")
+
+        manager.clear_conversation()
+
+        assert manager.get_session_messages() == []
+        assert manager.get_conversation_history() == []
+
+    def test_get_last_user_message(self, manager):
+        """Test retrieving the last user message."""
+        assert manager.get_last_user_message() is None
+
+        manager.add_message("First", "Reply")
+        manager.add_user_message("Second")
+
+        assert manager.get_last_user_message() == "Second"
+
+    def test_conversation_summary_cached_until_change(self, manager):
+        """Test that the summary is reused until the conversation changes."""
+        first = manager.get_conversation_summary()
+        second = manager.get_conversation_summary()
+
+        assert first == second
+        assert first["conversation_active"] is False
+        assert first["last_update"] is None
+
+        manager.add_message("Hello", "Hi there")
+        updated = manager.get_conversation_summary()
+
+        assert updated["total_session_messages"] == 2
+        assert updated["conversation_active"] is True
+        assert updated["last_update"] is not None
+
+        manager.clear_conversation()
+        cleared = manager.get_conversation_summary()
+
+        assert cleared["total_session_messages"] == 0
+        assert cleared["last_update"] is None
+
+    def test_load_session_messages(self, manager):
+        """Test restoring messages keeps order and timestamps and skips bad entries."""
+        saved = [
+            {"role": "user", "content": "Hello", "timestamp": "2024-01-01T10:00:00"},
+            {"role": "assistant", "content": "Hi there", "timestamp": "2024-01-01T10:00:01"},
+            {"role": "system", "content": "ignored"},
+            {"content": "no role"},
+            {"role": "user", "content": "Pending"},
+        ]
+
+        manager.load_session_messages(saved)
+
+        messages = manager.get_session_messages(iso_timestamps=True)
+        history = manager.get_conversation_history()
+
+        assert [m["content"] for m in messages] == ["Hello", "Hi there", "Pending"]
+        assert messages[0]["timestamp"] == "2024-01-01T10:00:00"
+        assert messages[-1]["timestamp"]
+        assert [m.content for m in history] == ["Hello", "Hi there", "Pending"]
+        assert manager.get_last_user_message() == "Pending"
+
+    def test_load_session_messages_round_trip(self, manager, config):
+        """Test that messages saved by one manager keep their timestamps when loaded."""
+        other = ConversationManager(config)
+        other.add_message("Hello", "Hi there")
+        saved = other.get_session_messages()
+
+        manager.load_session_messages(saved)
+
+        assert [m["ts"] for m in manager.get_session_messages()] == [m["ts"] for m in saved]
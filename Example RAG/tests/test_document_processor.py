@@ -2,11 +2,12 @@
 Unit tests for the document processor module.
 """
 
+import io
 import pytest
 import tempfile
 import os
 from pathlib import Path
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import Mock, patch
 
 # Add src to path for testing
 import sys
@@ -29,7 +30,8 @@ class TestDocumentProcessor:
             chunk_size=100,
             chunk_overlap=20,
             upload_dir="test_uploads",
-            max_file_size_mb=10
+            max_file_size_mb=10,
+            chunk_cache_max_mb=0
         )
     
     @pytest.fixture
@@ -61,11 +63,17 @@ class TestDocumentProcessor:
     async def test_process_pdf_success(self, mock_loader_class, processor):
         """Test successful PDF processing."""
         # Mock the PyPDFLoader
-        mock_loader = Mock()
-        mock_loader.aload = AsyncMock(return_value=[
+        pages = [
             Document(page_content="Test content page 1", metadata={"page": 1}),
             Document(page_content="Test content page 2", metadata={"page": 2})
-        ])
+        ]
+        
+        async def alazy_load():
+            for page in pages:
+                yield page
+        
+        mock_loader = Mock()
+        mock_loader.alazy_load = alazy_load
         mock_loader_class.return_value = mock_loader
         
         # Create a temporary PDF file
@@ -80,10 +88,61 @@ class TestDocumentProcessor:
             assert isinstance(result, list)
             assert len(result) > 0  # Should have chunks from text splitting
             assert all(isinstance(doc, Document) for doc in result)
+            assert [doc.metadata["page"] for doc in result] == [1, 2]
             
         finally:
             os.unlink(temp_path)
     
+    @pytest.mark.asyncio
+    @patch('core.document_processor.PyPDFLoader')
+    async def test_process_pdf_uses_chunk_cache(self, mock_loader_class, tmp_path):
+        """Test that re-processing the same PDF is served from the chunk cache."""
+        config = AppConfig(
+            openai_api_key="test-key",
+            chunk_size=100,
+            chunk_overlap=20,
+            upload_dir=str(tmp_path)
+        )
+        processor = DocumentProcessor(config)
+        
+        async def alazy_load():
+            yield Document(page_content="Cached content", metadata={"page": 1})
+        
+        mock_loader = Mock()
+        mock_loader.alazy_load = alazy_load
+        mock_loader_class.return_value = mock_loader
+        
+        pdf_path = tmp_path / "doc.pdf"
+        pdf_path.write_bytes(b"fake pdf content")
+        
+        first = await processor.process_pdf(str(pdf_path))
+        second = await processor.process_pdf(str(pdf_path))
+        
+        assert mock_loader_class.call_count == 1
+        assert [doc.page_content for doc in second] == [doc.page_content for doc in first]
+        assert len(list(processor.chunk_cache_dir.glob("*.pkl"))) == 1
+    
+    @pytest.mark.asyncio
+    async def test_process_uploaded_files_keeps_order_and_errors(self, processor):
+        """Test that batch processing returns per-file results in input order."""
+        async def fake_process(uploaded_file):
+            if uploaded_file == "bad.pdf":
+                raise ValueError("broken file")
+            return [Document(page_content=uploaded_file)]
+        
+        completed = []
+        with patch.object(processor, "process_uploaded_file", side_effect=fake_process):
+            results = await processor.process_uploaded_files(
+                ["a.pdf", "bad.pdf", "c.pdf"],
+                max_concurrency=2,
+                on_complete=lambda index, result: completed.append(index)
+            )
+        
+        assert [doc.page_content for doc in results[0]] == ["a.pdf"]
+        assert isinstance(results[1], ValueError)
+        assert [doc.page_content for doc in results[2]] == ["c.pdf"]
+        assert sorted(completed) == [0, 1, 2]
+    
     @pytest.mark.asyncio
     async def test_process_uploaded_file_invalid_type(self, processor):
         """Test processing uploaded file with invalid type."""
@@ -96,13 +155,27 @@ class TestDocumentProcessor:
     @pytest.mark.asyncio
     async def test_process_uploaded_file_too_large(self, processor):
         """Test processing uploaded file that's too large."""
-        mock_file = Mock()
+        mock_file = io.BytesIO(b"x" * (15 * 1024 * 1024))  # 15MB
         mock_file.name = "test.pdf"
-        mock_file.getvalue.return_value = b"x" * (15 * 1024 * 1024)  # 15MB
         
         with pytest.raises(ValueError, match="File too large"):
             await processor.process_uploaded_file(mock_file)
     
+    @pytest.mark.asyncio
+    async def test_process_uploaded_file_source_is_original_name(self, processor):
+        """Test that chunks name the uploaded file rather than its temporary copy."""
+        mock_file = io.BytesIO(b"%PDF-1.4")
+        mock_file.name = "report.pdf"
+        
+        async def fake_process_pdf(path):
+            return [Document(page_content="Content", metadata={"source": path, "page": 0})]
+        
+        with patch.object(processor, "process_pdf", side_effect=fake_process_pdf):
+            documents = await processor.process_uploaded_file(mock_file)
+        
+        assert documents[0].metadata["source"] == "report.pdf"
+        assert documents[0].metadata["page"] == 0
+    
     def test_get_document_stats_empty(self, processor):
         """Test getting stats for empty document list."""
         stats = processor.get_document_stats([])
@@ -0,0 +1,115 @@
+"""
+Unit tests for the embedding cache module.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+from pathlib import Path
+
+# Add src to path for testing
+import sys
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from utils.embedding_cache import CachedEmbeddings, SQLiteEmbeddingStore
+
+
+class TestCachedEmbeddings:
+    """Test cases for CachedEmbeddings class."""
+    
+    @pytest.fixture
+    def base_embeddings(self):
+        """Create mock embeddings model."""
+        embeddings = Mock()
+        embeddings.embed_query.side_effect = lambda text: [float(len(text)), 1.0]
+        embeddings.aembed_query = AsyncMock(side_effect=lambda text: [float(len(text)), 1.0])
+        embeddings.aembed_documents = AsyncMock(
+            side_effect=lambda texts: [[float(len(text)), 1.0] for text in texts]
+        )
+        embeddings.embed_documents.side_effect = lambda texts: [[1.0] for _ in texts]
+        return embeddings
+    
+    @pytest.fixture
+    def cached(self, base_embeddings):
+        """Create CachedEmbeddings instance with a small cache."""
+        return CachedEmbeddings(base_embeddings, maxsize=2)
+    
+    def test_embed_query_cached(self, cached, base_embeddings):
+        """Test that repeated queries hit the cache."""
+        first = cached.embed_query("hello")
+        second = cached.embed_query("hello")
+        
+        assert first == second == [5.0, 1.0]
+        base_embeddings.embed_query.assert_called_once_with("hello")
+        assert cached.hits == 1
+        assert cached.misses == 1
+    
+    def test_cached_vector_not_shared(self, cached):
+        """Test that callers mutating a returned vector do not corrupt the cache."""
+        vector = cached.embed_query("hello")
+        vector.append(99.0)
+        
+        assert cached.embed_query("hello") == [5.0, 1.0]
+    
+    def test_lru_eviction(self, cached, base_embeddings):
+        """Test that the least recently used query is evicted when full."""
+        cached.embed_query("a")
+        cached.embed_query("bb")
+        cached.embed_query("a")
+        cached.embed_query("ccc")
+        
+        cached.embed_query("a")
+        cached.embed_query("bb")
+        
+        assert base_embeddings.embed_query.call_count == 4
+    
+    @pytest.mark.asyncio
+    async def test_aembed_query_cached(self, cached, base_embeddings):
+        """Test that async queries share the cache with sync queries."""
+        cached.embed_query("hello")
+        
+        result = await cached.aembed_query("hello")
+        
+        assert result == [5.0, 1.0]
+        base_embeddings.aembed_documents.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_batched(self, cached, base_embeddings):
+        """Test that concurrent cache misses share one embedding request."""
+        results = await asyncio.gather(
+            cached.aembed_query("a"),
+            cached.aembed_query("bb"),
+            cached.aembed_query("a")
+        )
+        
+        assert results == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+        base_embeddings.aembed_documents.assert_awaited_once_with(["a", "bb"])
+    
+    def test_embed_documents_passthrough(self, cached, base_embeddings):
+        """Test that document embeddings are delegated without caching."""
+        result = cached.embed_documents(["x", "y"])
+        
+        assert result == [[1.0], [1.0]]
+        base_embeddings.embed_documents.assert_called_once_with(["x", "y"])
+    
+    def test_persistent_store_survives_new_cache(self, base_embeddings, tmp_path):
+        """Test that vectors persisted by one cache are reused by a fresh one."""
+        db_path = str(tmp_path / "embeddings.sqlite3")
+        
+        first = CachedEmbeddings(base_embeddings, store=SQLiteEmbeddingStore(db_path, "test-model"))
+        first.embed_query("hello")
+        first.store.close()
+        
+        second = CachedEmbeddings(base_embeddings, store=SQLiteEmbeddingStore(db_path, "test-model"))
+        
+        assert second.embed_query("hello") == [5.0, 1.0]
+        base_embeddings.embed_query.assert_called_once_with("hello")
+    
+    def test_persistent_store_keyed_by_model(self, tmp_path):
+        """Test that vectors from a different model are not returned."""
+        db_path = str(tmp_path / "embeddings.sqlite3")
+        SQLiteEmbeddingStore(db_path, "model-a").put("hello", [0.5, 0.25])
+        
+        assert SQLiteEmbeddingStore(db_path, "model-a").get("hello") == [0.5, 0.25]
+        assert SQLiteEmbeddingStore(db_path, "model-b").get("hello") is None
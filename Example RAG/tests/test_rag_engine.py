@@ -11,7 +11,7 @@ import sys
 src_path = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_path))
 
-from core.rag_engine import RAGEngine
+from core.rag_engine import RAGEngine, _coalesce_chunks, _configure_llm_cache
 from core.conversation_manager import ConversationManager
 from utils.config import AppConfig
 from langchain.schema import Document
@@ -44,8 +44,7 @@ class TestRAGEngine:
     
     @pytest.fixture
     @patch('core.rag_engine.ChatOpenAI')
-    @patch('core.rag_engine.ConversationalRetrievalChain')
-    def rag_engine(self, mock_chain, mock_llm, mock_vector_store, mock_conversation_manager, config):
+    def rag_engine(self, mock_llm, mock_vector_store, mock_conversation_manager, config):
         """Create RAGEngine instance with mocked dependencies."""
         return RAGEngine(mock_vector_store, mock_conversation_manager, config)
     
@@ -56,9 +55,62 @@ class TestRAGEngine:
         assert rag_engine.conversation_manager == mock_conversation_manager
         assert rag_engine.retriever is not None
     
+    @pytest.mark.asyncio
+    async def test_retrieve_documents_by_cached_vector(self, rag_engine):
+        """Test that retrieval embeds each question once and searches by vector."""
+        mock_docs = [Document(page_content="Test content")]
+        rag_engine.embeddings.embeddings.aembed_documents = AsyncMock(return_value=[[0.1, 0.2]])
+        rag_engine.vector_store.similarity_search_by_vector = Mock(return_value=mock_docs)
+        
+        first = await rag_engine._retrieve_documents("test question")
+        second = await rag_engine._retrieve_documents("test question")
+        
+        assert first == mock_docs
+        assert second == mock_docs
+        rag_engine.embeddings.embeddings.aembed_documents.assert_awaited_once_with(["test question"])
+        rag_engine.vector_store.similarity_search_by_vector.assert_called_once_with([0.1, 0.2], k=4)
+    
+    @pytest.mark.asyncio
+    async def test_paraphrased_question_reuses_documents(self, rag_engine):
+        """Test that a question with a near-identical embedding skips the vector search."""
+        mock_docs = [Document(page_content="Test content")]
+        rag_engine.embeddings.embeddings.aembed_documents = AsyncMock(
+            side_effect=[[[0.1, 0.2]], [[0.1, 0.201]]]
+        )
+        rag_engine.vector_store.similarity_search_by_vector = Mock(return_value=mock_docs)
+        
+        await rag_engine._retrieve_documents("What is the test about?")
+        result = await rag_engine._retrieve_documents("What's the test about?")
+        
+        assert result == mock_docs
+        rag_engine.vector_store.similarity_search_by_vector.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_retrieval_cache_cleared_on_vector_store_update(self, rag_engine):
+        """Test that cached documents are dropped when the vector store changes."""
+        rag_engine.embeddings = None
+        rag_engine.retriever.aget_relevant_documents = AsyncMock(
+            return_value=[Document(page_content="Old content")]
+        )
+        await rag_engine._retrieve_documents("test question")
+        
+        new_store = Mock()
+        new_store.embeddings = None
+        new_store.as_retriever.return_value.aget_relevant_documents = AsyncMock(
+            return_value=[Document(page_content="New content")]
+        )
+        rag_engine.update_vector_store(new_store)
+        
+        result = await rag_engine._retrieve_documents("test question")
+        
+        assert result[0].page_content == "New content"
+    
     @pytest.mark.asyncio
     async def test_retrieve_documents(self, rag_engine):
-        """Test document retrieval."""
+        """Test document retrieval through the retriever."""
+        # Without an embedding function the retriever is used directly
+        rag_engine.embeddings = None
+        
         # Mock retriever
         mock_docs = [
             Document(page_content="Test content 1"),
@@ -74,6 +126,8 @@ class TestRAGEngine:
     @pytest.mark.asyncio
     async def test_retrieve_documents_fallback_sync(self, rag_engine):
         """Test document retrieval fallback to sync method."""
+        rag_engine.embeddings = None
+        
         # Mock retriever without async method
         mock_docs = [Document(page_content="Test content")]
         rag_engine.retriever.get_relevant_documents = Mock(return_value=mock_docs)
@@ -85,6 +139,29 @@ class TestRAGEngine:
         
         assert result == mock_docs
     
+    @pytest.mark.asyncio
+    async def test_retrieve_documents_fused(self, rag_engine):
+        """Test that additional retrievers run alongside the vector store and are fused."""
+        rag_engine.embeddings = None
+        shared = Document(page_content="Shared content")
+        rag_engine.retriever.aget_relevant_documents = AsyncMock(
+            return_value=[Document(page_content="Vector only"), shared]
+        )
+        
+        keyword_retriever = Mock()
+        keyword_retriever.aget_relevant_documents = AsyncMock(
+            return_value=[Document(page_content="Shared content"), Document(page_content="Keyword only")]
+        )
+        failing_retriever = Mock()
+        failing_retriever.aget_relevant_documents = AsyncMock(side_effect=RuntimeError("offline"))
+        rag_engine.additional_retrievers = [keyword_retriever, failing_retriever]
+        
+        result = await rag_engine._retrieve_documents("test question")
+        
+        # The document found by both retrievers ranks first and appears once
+        assert [doc.page_content for doc in result] == ["Shared content", "Vector only", "Keyword only"]
+        keyword_retriever.aget_relevant_documents.assert_awaited_once_with("test question")
+    
     def test_prepare_context_empty(self, rag_engine):
         """Test context preparation with empty documents."""
         result = rag_engine._prepare_context([])
@@ -95,13 +172,16 @@ class TestRAGEngine:
         """Test context preparation with documents."""
         documents = [
             Document(page_content="Content 1", metadata={"source": "doc1.pdf", "page": 1}),
-            Document(page_content="Content 2", metadata={"source": "doc2.pdf", "page": 2})
+            Document(page_content="Content 2", metadata={"source": "doc2.pdf", "page": 2}),
+            Document(page_content="Content 1", metadata={"source": "doc1.pdf", "page": 1}),
+            Document(page_content="  content 2\n", metadata={"source": "doc3.pdf", "page": 3})
         ]
         
         result = rag_engine._prepare_context(documents)
         
-        assert "Content 1" in result
-        assert "Content 2" in result
+        assert result.count("Content 1") == 1
+        assert result.count("Content 2") == 1
+        assert "content 2" not in result
         assert "doc1.pdf" in result
         assert "doc2.pdf" in result
         assert "Page 1" in result
@@ -125,18 +205,51 @@ class TestRAGEngine:
         
         assert result == []
     
+    @pytest.mark.asyncio
+    async def test_aget_source_documents(self, rag_engine):
+        """Test getting source documents through the async retriever API."""
+        mock_docs = [Document(page_content="Test content")]
+        rag_engine.retriever.aget_relevant_documents = AsyncMock(return_value=mock_docs)
+        
+        result = await rag_engine.aget_source_documents("test question")
+        
+        assert result == mock_docs
+        rag_engine.retriever.aget_relevant_documents.assert_awaited_once_with("test question")
+    
+    @pytest.mark.asyncio
+    async def test_aget_source_documents_fallback_sync(self, rag_engine):
+        """Test async source documents fall back to the sync retriever off the event loop."""
+        mock_docs = [Document(page_content="Test content")]
+        rag_engine.retriever.get_relevant_documents = Mock(return_value=mock_docs)
+        if hasattr(rag_engine.retriever, 'aget_relevant_documents'):
+            delattr(rag_engine.retriever, 'aget_relevant_documents')
+        
+        result = await rag_engine.aget_source_documents("test question")
+        
+        assert result == mock_docs
+    
     def test_update_vector_store(self, rag_engine, mock_conversation_manager, config):
         """Test updating vector store."""
         new_mock_store = Mock()
         new_mock_retriever = Mock()
         new_mock_store.as_retriever.return_value = new_mock_retriever
         
-        with patch('core.rag_engine.ConversationalRetrievalChain'):
-            rag_engine.update_vector_store(new_mock_store)
+        rag_engine.update_vector_store(new_mock_store)
         
         assert rag_engine.vector_store == new_mock_store
         assert rag_engine.retriever == new_mock_retriever
     
+    @patch('core.rag_engine.ChatOpenAI')
+    def test_update_vector_store_keeps_llm(self, mock_llm, mock_vector_store, mock_conversation_manager, config):
+        """Test that swapping the vector store reuses the existing LLM client."""
+        rag_engine = RAGEngine(mock_vector_store, mock_conversation_manager, config)
+        llm = rag_engine.llm
+        
+        rag_engine.update_vector_store(Mock())
+        
+        mock_llm.assert_called_once()
+        assert rag_engine.llm is llm
+    
     def test_get_engine_stats(self, rag_engine, mock_conversation_manager, config):
         """Test getting engine statistics."""
         # Mock collection
@@ -158,10 +271,187 @@ class TestRAGEngine:
         assert result["total_messages"] == 4
         assert result["memory_limit"] == config.max_conversation_history
     
+    def test_get_engine_stats_memoized(self, rag_engine, mock_conversation_manager):
+        """Test that stats computed moments ago are reused until the vector store changes."""
+        mock_collection = Mock()
+        mock_collection.count.return_value = 25
+        rag_engine.vector_store._collection = mock_collection
+        mock_conversation_manager.get_conversation_summary.return_value = {}
+        
+        first = rag_engine.get_engine_stats()
+        first["model"] = "mutated"
+        second = rag_engine.get_engine_stats()
+        
+        assert second["model"] == rag_engine.config.openai_model
+        assert mock_collection.count.call_count == 1
+        assert mock_conversation_manager.get_conversation_summary.call_count == 1
+        
+        new_store = Mock()
+        new_store.embeddings = None
+        new_store._collection.count.return_value = 7
+        rag_engine.update_vector_store(new_store)
+        
+        assert rag_engine.get_engine_stats()["vector_store_documents"] == 7
+    
     def test_get_engine_stats_error(self, rag_engine):
         """Test getting engine statistics with error."""
         rag_engine.vector_store._collection = Mock(side_effect=Exception("Test error"))
         
         result = rag_engine.get_engine_stats()
         
-        assert "error" in result
\ No newline at end of file
+        assert "error" in result
+    
+    @pytest.mark.asyncio
+    async def test_generate_response_uses_answer_cache(self, rag_engine, mock_conversation_manager):
+        """Test that a repeated question is answered from the cache."""
+        mock_docs = [Document(page_content="Test content", metadata={"source": "doc.pdf"})]
+        rag_engine.embeddings.embeddings.aembed_documents = AsyncMock(return_value=[[0.1, 0.2]])
+        rag_engine.vector_store.similarity_search_by_vector = Mock(return_value=mock_docs)
+        mock_conversation_manager.get_context_for_rag.return_value = ""
+        
+        async def fake_stream(question, context, chat_history):
+            yield "Cached "
+            yield "answer"
+        
+        rag_engine._stream_llm_response = Mock(side_effect=fake_stream)
+        
+        first = [chunk async for chunk in rag_engine.generate_response("test question")]
+        second = [chunk async for chunk in rag_engine.generate_response("test question")]
+        
+        assert "".join(first) == "Cached answer"
+        assert "".join(second) == "Cached answer"
+        assert rag_engine._stream_llm_response.call_count == 1
+        assert mock_conversation_manager.add_message.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_coalesce_chunks(self):
+        """Test that streamed chunks are merged without losing or reordering text."""
+        async def stream():
+            for chunk in ["a", "b", "c", "d"]:
+                yield chunk
+        
+        merged = [chunk async for chunk in _coalesce_chunks(stream(), max_chars=2, flush_interval=10)]
+        
+        assert merged == ["ab", "cd"]
+    
+    def test_close(self, rag_engine):
+        """Test that closing the engine shuts down its retrieval pool."""
+        rag_engine.close()
+        
+        with pytest.raises(RuntimeError):
+            rag_engine._retrieve_pool.submit(lambda: None)
+    
+    def test_prepare_context_order_independent(self, rag_engine):
+        """Test that the context does not depend on retrieval order."""
+        documents = [
+            Document(page_content="Content 2", metadata={"source": "doc2.pdf", "page": 2}),
+            Document(page_content="Content 1", metadata={"source": "doc1.pdf", "page": 1})
+        ]
+        
+        forward = rag_engine._prepare_context(documents)
+        backward = rag_engine._prepare_context(list(reversed(documents)))
+        
+        assert forward == backward
+        assert forward.index("Content 1") < forward.index("Content 2")
+    
+    @pytest.mark.asyncio
+    async def test_generate_response_without_documents(self, rag_engine, mock_conversation_manager):
+        """Test that the LLM is skipped when retrieval finds nothing."""
+        rag_engine._retrieve_documents = AsyncMock(return_value=[])
+        rag_engine._stream_llm_response = Mock()
+        mock_conversation_manager.get_context_for_rag.return_value = ""
+        
+        chunks = [chunk async for chunk in rag_engine.generate_response("test question")]
+        
+        assert chunks == ["No relevant information found."]
+        rag_engine._stream_llm_response.assert_not_called()
+        mock_conversation_manager.add_message.assert_called_once_with(
+            "test question", "No relevant information found."
+        )
+    
+    @pytest.mark.asyncio
+    async def test_astream_response_events(self, rag_engine, mock_conversation_manager):
+        """Test that retrieval, token and done events arrive in order."""
+        mock_docs = [Document(page_content="Test content", metadata={"source": "doc.pdf"})]
+        rag_engine._retrieve_documents = AsyncMock(return_value=mock_docs)
+        rag_engine.embeddings = None
+        mock_conversation_manager.get_context_for_rag.return_value = ""
+        
+        async def fake_stream(question, context, chat_history):
+            yield "Streamed answer"
+        
+        rag_engine._stream_llm_response = Mock(side_effect=fake_stream)
+        
+        events = [event async for event in rag_engine.astream_response("test question")]
+        
+        assert [event["type"] for event in events] == ["retrieval", "token", "done"]
+        assert events[0]["documents"] == mock_docs
+        assert events[1]["content"] == "Streamed answer"
+        assert events[2]["answer"] == "Streamed answer"
+        assert events[2]["cached"] is False
+    
+    @patch('core.rag_engine.ChatOpenAI')
+    @patch('core.rag_engine.set_llm_cache')
+    def test_llm_cache_enabled(self, mock_set_llm_cache, mock_llm, mock_vector_store, mock_conversation_manager, config):
+        """Test that the LLM cache is installed once however many engines are created."""
+        _configure_llm_cache.cache_clear()
+        config.llm_cache_backend = "memory"
+        
+        try:
+            RAGEngine(mock_vector_store, mock_conversation_manager, config)
+            RAGEngine(mock_vector_store, mock_conversation_manager, config)
+            
+            mock_set_llm_cache.assert_called_once()
+        finally:
+            _configure_llm_cache.cache_clear()
+    
+    @pytest.mark.asyncio
+    async def test_stream_llm_response_with_llm_cache(self, rag_engine):
+        """Test that a cached LLM call without streamed tokens yields the whole answer."""
+        rag_engine.config.llm_cache_backend = "memory"
+        rag_engine.llm.ainvoke = AsyncMock(return_value=Mock(content="Cached answer"))
+        
+        chunks = [chunk async for chunk in rag_engine._stream_llm_response("question", "context", "")]
+        
+        assert chunks == ["Cached answer"]
+        assert "callbacks" in rag_engine.llm.ainvoke.call_args.kwargs["config"]
+    
+    @pytest.mark.asyncio
+    async def test_abatch_generate_groups_by_shared_documents(self, rag_engine, mock_conversation_manager):
+        """Test that questions sharing documents are answered back to back, results in input order."""
+        shared = [Document(page_content="Shared 1"), Document(page_content="Shared 2")]
+        other = [Document(page_content="Other")]
+        retrieved = {"first": shared, "second": other, "third": shared}
+        rag_engine._retrieve_documents = AsyncMock(side_effect=lambda question: retrieved[question])
+        rag_engine.embeddings = None
+        mock_conversation_manager.get_context_for_rag.return_value = ""
+        
+        call_order = []
+        
+        async def fake_stream(question, context, chat_history):
+            call_order.append(question)
+            yield f"Answer to {question}"
+        
+        rag_engine._stream_llm_response = Mock(side_effect=fake_stream)
+        
+        answers = await rag_engine.abatch_generate(["first", "second", "third"])
+        
+        assert answers == ["Answer to first", "Answer to second", "Answer to third"]
+        assert call_order == ["first", "third", "second"]
+        assert [call.args[0] for call in mock_conversation_manager.add_message.call_args_list] == [
+            "first", "second", "third"
+        ]
+    
+    def test_prefetch_followups_warms_semantic_cache(self, rag_engine):
+        """Test that predicted follow-up questions have their documents cached."""
+        mock_docs = [Document(page_content="Follow-up content")]
+        rag_engine.llm.invoke = Mock(return_value=Mock(content="1. What about pricing?\n2. Who maintains it?\n"))
+        rag_engine.embeddings = Mock()
+        rag_engine.embeddings.embed_query.side_effect = lambda text: [1.0, 0.0] if "pricing" in text else [0.0, 1.0]
+        rag_engine.vector_store.similarity_search_by_vector = Mock(return_value=mock_docs)
+        
+        rag_engine._prefetch_followups("What is it?", "It is a product.")
+        
+        rag_engine.embeddings.embed_query.assert_any_call("What about pricing?")
+        assert rag_engine.vector_store.similarity_search_by_vector.call_count == 2
+        assert rag_engine._semantic_cache.get([1.0, 0.0]) == mock_docs
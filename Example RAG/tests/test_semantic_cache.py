@@ -0,0 +1,63 @@
+"""
+Unit tests for the semantic cache module.
+"""
+
+import pytest
+from pathlib import Path
+
+# Add src to path for testing
+import sys
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from utils.semantic_cache import SemanticCache
+
+
+class TestSemanticCache:
+    """Test cases for SemanticCache class."""
+    
+    @pytest.fixture
+    def cache(self):
+        """Create SemanticCache instance with a small capacity."""
+        return SemanticCache(threshold=0.95, maxsize=2)
+    
+    def test_exact_vector_hit(self, cache):
+        """Test that the same vector returns the stored value."""
+        cache.put([1.0, 0.0, 0.0], "docs")
+        
+        assert cache.get([1.0, 0.0, 0.0]) == "docs"
+        assert cache.hits == 1
+    
+    def test_similar_vector_hit(self, cache):
+        """Test that a slightly different vector above the threshold matches."""
+        cache.put([1.0, 0.0, 0.0], "docs")
+        
+        assert cache.get([2.0, 0.05, 0.0]) == "docs"
+    
+    def test_dissimilar_vector_miss(self, cache):
+        """Test that vectors below the threshold do not match."""
+        cache.put([1.0, 0.0, 0.0], "docs")
+        
+        assert cache.get([0.0, 1.0, 0.0]) is None
+        assert cache.get([0.0, 0.0, 0.0]) is None
+        assert cache.misses == 1
+    
+    def test_lru_eviction(self, cache):
+        """Test that the least recently used entry is evicted when full."""
+        cache.put([1.0, 0.0, 0.0], "a")
+        cache.put([0.0, 1.0, 0.0], "b")
+        cache.get([1.0, 0.0, 0.0])
+        cache.put([0.0, 0.0, 1.0], "c")
+        
+        assert len(cache) == 2
+        assert cache.get([1.0, 0.0, 0.0]) == "a"
+        assert cache.get([0.0, 1.0, 0.0]) is None
+    
+    def test_clear(self, cache):
+        """Test clearing the cache."""
+        cache.put([1.0, 0.0, 0.0], "docs")
+        
+        cache.clear()
+        
+        assert len(cache) == 0
+        assert cache.get([1.0, 0.0, 0.0]) is None
@@ -0,0 +1,46 @@
+"""
+Unit tests for the vector operations module.
+"""
+
+import numpy as np
+import pytest
+from pathlib import Path
+
+# Add src to path for testing
+import sys
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from utils.vecops import make_cosine, normalize, normalize_rows
+
+
+class TestVecops:
+    """Test cases for vector normalization helpers."""
+    
+    def test_normalize(self):
+        """Test that a vector is scaled to unit length."""
+        result = normalize([3.0, 4.0])
+        
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, [0.6, 0.8], rtol=1e-6)
+    
+    def test_normalize_zero_vector(self):
+        """Test that a zero vector stays zero instead of producing NaNs."""
+        result = normalize([0.0, 0.0])
+        
+        np.testing.assert_array_equal(result, [0.0, 0.0])
+    
+    def test_normalize_rows(self):
+        """Test that each row is normalized independently."""
+        result = normalize_rows([[3.0, 4.0], [0.0, 0.0], [0.0, 2.0]])
+        
+        np.testing.assert_allclose(result, [[0.6, 0.8], [0.0, 0.0], [0.0, 1.0]], rtol=1e-6)
+    
+    def test_make_cosine(self):
+        """Test the dimension-specialized cosine similarity."""
+        cosine = make_cosine(2)
+        
+        assert cosine(np.array([1.0, 0.0], dtype=np.float32), np.array([2.0, 0.0], dtype=np.float32)) == pytest.approx(1.0)
+        assert cosine(np.array([1.0, 0.0], dtype=np.float32), np.array([0.0, 3.0], dtype=np.float32)) == pytest.approx(0.0)
+        assert cosine(np.array([0.0, 0.0], dtype=np.float32), np.array([1.0, 1.0], dtype=np.float32)) == 0.0
+        assert make_cosine(2) is cosine
@@ -5,6 +5,7 @@ Unit tests for the vector store manager module.
 import pytest
 import tempfile
 import shutil
+import time
 from pathlib import Path
 from unittest.mock import Mock, patch
 
@@ -43,6 +44,7 @@ class TestVectorStoreManager:
     def vector_store_manager(self, mock_embeddings, config):
         """Create VectorStoreManager instance with mocked embeddings."""
         mock_embeddings.return_value = Mock()
+        mock_embeddings.return_value.embed_documents.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
         return VectorStoreManager(config)
     
     def test_initialization(self, vector_store_manager, config):
@@ -77,9 +79,40 @@ class TestVectorStoreManager:
         
         result = vector_store_manager.create_knowledge_base("Test KB", documents)
         
-        # Verify
+        # Verify documents are written once with precomputed embeddings
         assert result == mock_vector_store
-        mock_vector_store.add_documents.assert_called_once_with(documents)
+        mock_vector_store._collection.add.assert_called_once()
+        add_kwargs = mock_vector_store._collection.add.call_args.kwargs
+        assert add_kwargs["embeddings"] == [[0.1, 0.2], [0.1, 0.2]]
+        assert add_kwargs["documents"] == ["Test content 1", "Test content 2"]
+        assert add_kwargs["metadatas"] is None
+        
+        metadata = mock_chroma.call_args.kwargs["collection_metadata"]
+        assert metadata["hnsw:space"] == "cosine"
+        assert metadata["hnsw:M"] == 32
+        assert metadata["hnsw:construction_ef"] == 200
+        assert metadata["hnsw:search_ef"] == 64
+    
+    @patch('core.vector_store.Chroma')
+    def test_create_knowledge_base_hnsw_from_config(self, mock_chroma, temp_dir):
+        """Test that HNSW settings for new collections come from the configuration."""
+        config = AppConfig(
+            openai_api_key="test-key",
+            chroma_persist_dir=str(temp_dir / "chroma"),
+            hnsw_m=16,
+            hnsw_construction_ef=100,
+            hnsw_search_ef=128
+        )
+        with patch('core.vector_store.OpenAIEmbeddings'):
+            manager = VectorStoreManager(config)
+        manager.knowledge_base_exists = Mock(return_value=False)
+        
+        manager.create_knowledge_base("Test KB", [Document(page_content="Test")])
+        
+        metadata = mock_chroma.call_args.kwargs["collection_metadata"]
+        assert metadata["hnsw:M"] == 16
+        assert metadata["hnsw:construction_ef"] == 100
+        assert metadata["hnsw:search_ef"] == 128
     
     def test_create_knowledge_base_empty_name(self, vector_store_manager):
         """Test knowledge base creation with empty name."""
@@ -152,4 +185,143 @@ class TestVectorStoreManager:
         
         result = vector_store_manager.get_knowledge_base_stats("Nonexistent KB")
         
-        assert result is None
\ No newline at end of file
+        assert result is None
+    
+    @patch('core.vector_store.Chroma')
+    def test_create_knowledge_base_batches_documents(self, mock_chroma, vector_store_manager):
+        """Test that documents are added in batches of the configured size."""
+        mock_vector_store = Mock()
+        mock_chroma.return_value = mock_vector_store
+        vector_store_manager.knowledge_base_exists = Mock(return_value=False)
+        vector_store_manager.config.embedding_batch_size = 2
+        
+        documents = [Document(page_content=f"Content {i}") for i in range(5)]
+        
+        vector_store_manager.create_knowledge_base("Test KB", documents)
+        
+        batches = [call.kwargs["documents"] for call in mock_vector_store._collection.add.call_args_list]
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert [text for batch in batches for text in batch] == [doc.page_content for doc in documents]
+        
+        embed_calls = vector_store_manager.embeddings.embeddings.embed_documents.call_args_list
+        assert [len(call.args[0]) for call in embed_calls] == [2, 2, 1]
+    
+    @patch('core.vector_store.Chroma')
+    def test_add_documents_separates_empty_metadata(self, mock_chroma, vector_store_manager):
+        """Test that documents without metadata are written without a metadatas list."""
+        mock_vector_store = Mock()
+        mock_chroma.return_value = mock_vector_store
+        vector_store_manager.knowledge_base_exists = Mock(return_value=False)
+        
+        documents = [
+            Document(page_content="With metadata", metadata={"source": "doc.pdf"}),
+            Document(page_content="Without metadata")
+        ]
+        
+        vector_store_manager.create_knowledge_base("Test KB", documents)
+        
+        calls = [call.kwargs for call in mock_vector_store._collection.add.call_args_list]
+        assert calls[0]["documents"] == ["With metadata"]
+        assert calls[0]["metadatas"] == [{"source": "doc.pdf"}]
+        assert calls[1]["documents"] == ["Without metadata"]
+        assert calls[1]["metadatas"] is None
+    
+    @patch('core.vector_store.Chroma')
+    def test_create_knowledge_base_failure_frees_name(self, mock_chroma, vector_store_manager):
+        """Test that a failed creation removes the collection so the name can be reused."""
+        mock_vector_store = Mock()
+        mock_vector_store._collection.add.side_effect = Exception("Rate limit")
+        mock_chroma.return_value = mock_vector_store
+        vector_store_manager._client = Mock()
+        vector_store_manager._client.list_collections.return_value = []
+        documents = [Document(page_content="Test")]
+        
+        with pytest.raises(Exception, match="Rate limit"):
+            vector_store_manager.create_knowledge_base("Test KB", documents)
+        
+        vector_store_manager._client.delete_collection.assert_called_once_with("test_kb")
+        assert vector_store_manager.knowledge_base_exists("Test KB") is False
+        
+        mock_vector_store._collection.add.side_effect = None
+        assert vector_store_manager.create_knowledge_base("Test KB", documents) == mock_vector_store
+    
+    def test_knowledge_base_exists_uses_collection_listing(self, vector_store_manager):
+        """Test existence checks against both name and object collection listings."""
+        named_collection = Mock()
+        named_collection.name = "other_kb"
+        vector_store_manager._client = Mock()
+        vector_store_manager._client.list_collections.return_value = ["test_kb", named_collection]
+        
+        assert vector_store_manager.knowledge_base_exists("Test KB") is True
+        assert vector_store_manager.knowledge_base_exists("Other KB") is True
+        assert vector_store_manager.knowledge_base_exists("Missing KB") is False
+        vector_store_manager._client.delete_collection.assert_not_called()
+    
+    def test_knowledge_base_names_cached(self, vector_store_manager):
+        """Test that existence checks list collections once and track deletions."""
+        vector_store_manager._client = Mock()
+        vector_store_manager._client.list_collections.return_value = ["test_kb"]
+        vector_store_manager._client.delete_collection.side_effect = (
+            lambda name: vector_store_manager._client.list_collections.return_value.remove(name)
+        )
+        
+        assert vector_store_manager.knowledge_base_exists("Test KB") is True
+        assert vector_store_manager.knowledge_base_exists("Test KB") is True
+        vector_store_manager._client.list_collections.assert_called_once()
+        
+        assert vector_store_manager.delete_knowledge_base("Test KB") is True
+        assert vector_store_manager.knowledge_base_exists("Test KB") is False
+    
+    def test_knowledge_base_names_see_other_sessions(self, vector_store_manager):
+        """Test that knowledge bases created or deleted elsewhere are noticed."""
+        vector_store_manager._client = Mock()
+        vector_store_manager._client.list_collections.return_value = []
+        assert vector_store_manager.knowledge_base_exists("Test KB") is False
+        
+        # Created by another session: a miss lists the collections again
+        vector_store_manager._client.list_collections.return_value = ["test_kb"]
+        assert vector_store_manager.knowledge_base_exists("Test KB") is True
+        
+        # Deleted by another session: noticed once the cached listing expires
+        vector_store_manager._client.list_collections.return_value = []
+        with patch('core.vector_store.time.monotonic', return_value=time.monotonic() + 60):
+            assert vector_store_manager.knowledge_base_exists("Test KB") is False
+    
+    @patch('core.vector_store.Chroma')
+    def test_failed_create_does_not_register_name(self, mock_chroma, vector_store_manager):
+        """Test that a name is only cached once its documents are written."""
+        mock_chroma.return_value._collection.add.side_effect = Exception("Rate limit")
+        vector_store_manager._client = Mock()
+        vector_store_manager._client.list_collections.return_value = []
+        vector_store_manager._remove_collection = Mock()
+        
+        with pytest.raises(Exception, match="Rate limit"):
+            vector_store_manager.create_knowledge_base("Test KB", [Document(page_content="Test")])
+        
+        assert "test_kb" not in vector_store_manager._kb_names
+    
+    def test_faiss_backend_round_trip(self, temp_dir):
+        """Test creating, loading, extending and deleting a FAISS knowledge base."""
+        pytest.importorskip("faiss")
+        config = AppConfig(
+            openai_api_key="test-key",
+            chroma_persist_dir=str(temp_dir / "chroma"),
+            vector_backend="faiss"
+        )
+        with patch('core.vector_store.OpenAIEmbeddings') as mock_embeddings:
+            mock_embeddings.return_value.embed_documents.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+            manager = VectorStoreManager(config)
+        
+        documents = [Document(page_content=f"Content {i}", metadata={"page": i}) for i in range(3)]
+        manager.create_knowledge_base("Test KB", documents)
+        
+        vector_store = manager.get_knowledge_base("Test KB")
+        assert vector_store._collection.count() == 3
+        assert vector_store.similarity_search_by_vector([0.1, 0.2], k=1)[0].page_content.startswith("Content")
+        assert [kb["collection_name"] for kb in manager.list_knowledge_bases()] == ["test_kb"]
+        
+        assert manager.add_documents_to_knowledge_base("Test KB", [Document(page_content="More")]) is True
+        assert manager.get_knowledge_base_stats("Test KB")["document_count"] == 4
+        
+        assert manager.delete_knowledge_base("Test KB") is True
+        assert manager.knowledge_base_exists("Test KB") is False
@@ -20,9 +20,13 @@ def validate_project_structure():
         "src/__init__.py",
         "src/utils/__init__.py",
         "src/utils/config.py",
+        "src/utils/embedding_cache.py",
+        "src/utils/semantic_cache.py",
+        "src/utils/vecops.py",
         "src/core/__init__.py", 
         "src/core/document_processor.py",
         "src/core/vector_store.py",
+        "src/core/faiss_store.py",
         "src/core/conversation_manager.py",
         "src/core/rag_engine.py",
         "src/application/__init__.py",
@@ -34,7 +38,11 @@ def validate_project_structure():
         "tests/__init__.py",
         "tests/test_document_processor.py",
         "tests/test_vector_store.py",
-        "tests/test_rag_engine.py"
+        "tests/test_rag_engine.py",
+        "tests/test_conversation_manager.py",
+        "tests/test_embedding_cache.py",
+        "tests/test_semantic_cache.py",
+        "tests/test_vecops.py"
     ]
     
     required_dirs = [